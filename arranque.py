@@ -0,0 +1,30 @@
+# =============================================================================
+# REPORTE DE ARRANQUE DEL PROCESO
+# =============================================================================
+# Streamlit re-ejecuta app.py en cada interacción, pero los módulos importados
+# viven lo que vive el proceso. Este módulo se importa primero en app.py, así
+# que INICIO marca el comienzo de la primera ejecución del script; cada marca
+# se registra una sola vez por proceso.
+import time
+from contextlib import contextmanager
+
+INICIO = time.perf_counter()
+_marcas = {}
+
+
+def marcar(nombre):
+    # Segundos desde INICIO hasta la primera vez que se llega a este punto
+    if nombre not in _marcas:
+        _marcas[nombre] = time.perf_counter() - INICIO
+
+
+@contextmanager
+def medir(nombre):
+    # Duración de un bloque que solo se ejecuta una vez (ej: un import diferido)
+    t0 = time.perf_counter()
+    yield
+    _marcas.setdefault(nombre, time.perf_counter() - t0)
+
+
+def reporte():
+    return {nombre: round(segundos, 4) for nombre, segundos in _marcas.items()}
@@ -0,0 +1,212 @@
+# =============================================================================
+# BANCO DE FEEDBACK PRE-GENERADO (CASO x EQUIPO x FIRMA DE ERRORES)
+# =============================================================================
+# El validador solo puede producir un conjunto finito de resultados: para cada
+# caso y equipo, alguna combinación de restricciones que fallan (o "equipo no
+# sugerido"). Este módulo enumera esas firmas, genera offline el feedback del
+# profesor para cada una y lo guarda en una tabla comprimida que se distribuye
+# con la app (data/banco_feedback.json.gz). En ejecución el banco se consulta
+# antes que la cache y la red, así que durante una prueba el feedback sale al
+# instante aunque la red esté congestionada. Uso:
+#
+#   python banco_feedback.py                  # con Gemini (GEMINI_API_KEY)
+#   python banco_feedback.py --local          # textos de plantilla, sin red
+#
+# Cada caso guarda una huella de su descripción y solución: si el caso cambia
+# en data/casos.jsonl, sus entradas dejan de servirse hasta regenerar el banco.
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import combinations
+
+from cache_ia import clave_feedback
+from casos import DB_CASOS
+from validacion import EQUIPOS, ResultadoValidacion, motor
+
+RUTA_BANCO = os.environ.get("KINE_BANCO", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "banco_feedback.json.gz"))
+
+def huella(caso):
+    datos = json.dumps([caso["desc"], caso["solucion"]], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(datos.encode("utf-8")).hexdigest()[:16]
+
+
+# =============================================================================
+# ENUMERACIÓN DE FIRMAS
+# =============================================================================
+class _Valor:
+    # Reemplaza el valor del alumno en los mensajes (admite formatos como {valor:.3g})
+    def __format__(self, especificacion):
+        return "el valor elegido"
+
+
+def _resultado(caso, equipo, fallidas):
+    mensajes = [f"✅ **Equipo:** {equipo} es una opción correcta."]
+    mensajes += [r.mensaje.format(valor=_Valor(), limite=r.limite) for r in fallidas]
+    es_correcto = not any(r.bloquea for r in fallidas)
+    return ResultadoValidacion(es_correcto, True, tuple(mensajes), tuple(r.codigo for r in fallidas))
+
+
+def firmas(casos=None):
+    # (clave, caso, equipo, resultado) para cada resultado posible de la validación
+    m = motor()
+    for caso in casos or DB_CASOS.ids():
+        validos = set(DB_CASOS[caso]["solucion"].get("equipos", []))
+        for equipo in EQUIPOS:
+            if equipo not in validos:
+                resultado = m.validar(caso, equipo, {})
+                yield clave_feedback(caso, equipo, resultado), caso, equipo, resultado
+                continue
+            restricciones = m.restricciones(caso, equipo)
+            for n in range(len(restricciones) + 1):
+                for fallidas in combinations(restricciones, n):
+                    resultado = _resultado(caso, equipo, fallidas)
+                    yield clave_feedback(caso, equipo, resultado), caso, equipo, resultado
+
+
+# =============================================================================
+# GENERACIÓN
+# =============================================================================
+def prompt_banco(caso, equipo, resultado):
+    return f"""
+    Eres un profesor de Kinesiología.
+    Caso: {caso['desc']}
+    Alumno eligió: {equipo}
+    Validación técnica del sistema: {resultado.texto}
+
+    Tarea:
+    Da feedback en base a la validación técnica. Si falló, explica la fisiología. Si acertó, felicita.
+    Máximo 50 palabras.
+    """
+
+
+def feedback_local(caso, equipo, resultado):
+    # Texto de plantilla para probar el banco sin red
+    if not resultado.equipo_valido:
+        return f"Revisa la indicación: para este cuadro {equipo} no es la primera opción. {resultado.mensajes[0]}"
+    if not resultado.fallos:
+        return f"¡Bien hecho! La dosificación de {equipo} es coherente con el objetivo terapéutico del caso."
+    return "Vas por buen camino, pero ajusta: " + " ".join(resultado.mensajes[1:])
+
+
+def generador_gemini():
+    from cliente_gemini import URL_BASE, ClienteGemini, LimiteTokens
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    if not api_key:
+        sys.exit("Falta GEMINI_API_KEY (o usa --local)")
+    limite = LimiteTokens(por_segundo=float(os.environ.get("GEMINI_RPS", 5)), rafaga=10)
+    cliente = ClienteGemini(api_key, url_base=os.environ.get("GEMINI_BASE_URL", URL_BASE),
+                            limite=limite, espera_limite=60.0, timeout_lectura=60)
+
+    def generar(caso, equipo, resultado):
+        return cliente.generar(prompt_banco(caso, equipo, resultado), espera_max=120.0)
+    return generar
+
+
+def cargar(ruta):
+    try:
+        with gzip.open(ruta, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"casos": {}, "feedback": {}}
+
+
+def guardar(ruta, banco):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with gzip.open(temporal, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(banco, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    os.replace(temporal, ruta)
+
+
+def generar_banco(ruta, generar, concurrencia=8, regenerar=False):
+    # Genera solo las firmas que faltan (o las de casos que cambiaron); se puede
+    # interrumpir y volver a correr sin perder lo ya generado
+    banco = cargar(ruta)
+    huellas = {caso: huella(DB_CASOS[caso]) for caso in DB_CASOS.ids()}
+    cambiados = {caso for caso, h in huellas.items() if regenerar or banco["casos"].get(caso) != h}
+    feedback = {clave: texto for clave, texto in banco["feedback"].items()
+                if clave.split("|", 1)[0] in huellas and clave.split("|", 1)[0] not in cambiados}
+
+    pendientes = [f for f in firmas() if f[0] not in feedback]
+    print(f"{len(feedback)} firmas vigentes, {len(pendientes)} por generar", file=sys.stderr)
+
+    errores = 0
+    inicio = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+            futuros = {hilos.submit(generar, DB_CASOS[caso], equipo, resultado): clave
+                       for clave, caso, equipo, resultado in pendientes}
+            for i, futuro in enumerate(as_completed(futuros), 1):
+                try:
+                    texto = futuro.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"  error en {futuros[futuro]}: {e}", file=sys.stderr)
+                    continue
+                feedback[futuros[futuro]] = texto.strip()
+                if i % 50 == 0:
+                    print(f"  {i}/{len(pendientes)} ({time.perf_counter() - inicio:.1f} s)", file=sys.stderr)
+    finally:
+        # Lo que falte (errores o interrupción) se genera en la próxima corrida
+        guardar(ruta, {"casos": huellas, "feedback": feedback})
+    return len(feedback), errores
+
+
+# =============================================================================
+# CONSULTA EN EJECUCIÓN
+# =============================================================================
+class BancoFeedback:
+    def __init__(self, ruta=RUTA_BANCO, casos=DB_CASOS):
+        banco = cargar(ruta)
+        self._huellas = banco["casos"]
+        self._feedback = banco["feedback"]
+        self._casos = casos
+        self._vigentes = (None, {})  # (versión de casos, caso -> huella coincide)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._feedback)
+
+    def _vigente(self, caso):
+        version, vigentes = self._vigentes
+        if version != self._casos.version:
+            version, vigentes = self._vigentes = (self._casos.version, {})
+        if caso not in vigentes:
+            vigentes[caso] = caso in self._casos and self._huellas.get(caso) == huella(self._casos[caso])
+        return vigentes[caso]
+
+    def obtener(self, clave):
+        texto = self._feedback.get(clave)
+        if texto is None or not self._vigente(clave.split("|", 1)[0]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return texto
+
+    def estadisticas(self):
+        return {"firmas": len(self._feedback), "hits": self.hits, "misses": self.misses}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-genera el feedback del profesor para cada resultado posible.")
+    parser.add_argument("--salida", default=RUTA_BANCO)
+    parser.add_argument("--local", action="store_true", help="usar textos de plantilla en vez de Gemini")
+    parser.add_argument("--concurrencia", type=int, default=8)
+    parser.add_argument("--regenerar", action="store_true", help="ignorar lo ya generado")
+    args = parser.parse_args(argv)
+
+    generar = feedback_local if args.local else generador_gemini()
+    total, errores = generar_banco(args.salida, generar, args.concurrencia, args.regenerar)
+    print(f"{total} firmas en {args.salida} ({os.path.getsize(args.salida) / 1024:.1f} KiB), {errores} errores", file=sys.stderr)
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# =============================================================================
+# BARRIDO DEL ESPACIO DE PARÁMETROS (REGIÓN DE ACEPTACIÓN POR CASO)
+# =============================================================================
+# Evalúa las restricciones compiladas de un (caso, equipo) sobre una grilla
+# completa de parámetros en una sola pasada con NumPy. El resultado es una
+# máscara booleana por punto de la grilla que se guarda en cache por proceso y
+# sirve para:
+#   - responder al instante si una configuración pasa (Region.contiene),
+#   - medir qué tan cerca quedó una configuración (Region.distancia),
+#   - proyectar la región a 2D para un mapa de calor (Region.mapa),
+#   - auditar la consistencia de las reglas de todos los casos (auditar).
+from functools import lru_cache
+
+import numpy as np
+
+import dosis
+from casos import DB_CASOS
+from validacion import Exacto, Maximo, Minimo, Permitidos, motor
+
+
+def _rango(inicio, fin, paso):
+    return np.arange(inicio, fin + paso / 2, paso)
+
+
+# Grillas por defecto: mismos rangos que los formularios de la interfaz
+GRILLAS = {
+    "TENS": (("freq", _rango(0, 250, 1)), ("duracion", _rango(0, 500, 1))),
+    "Rusa": (("ratio", np.array(["1:1", "1:2", "1:4", "1:5"])), ("burst", _rango(0, 100, 1))),
+    "TIF": (("vector", np.array(["Manual/Off", "6:6", "1:30:1:30"])), ("portadora", _rango(0, 10000, 50))),
+    "Farádica": (("polaridad", np.array(["Normal", "Inversión"])), ("fase", _rango(0, 5000, 10))),
+    "Ultrasonido": (
+        ("frecuencia", np.array(["1 MHz", "3 MHz"])),
+        ("ciclo", np.array(["100% (Continuo)", "50% (1:1)", "20% (1:4)", "10%"])),
+        ("intensidad", _rango(0, 3, 0.1)),
+    ),
+    "Onda Corta": (
+        ("metodo", np.array(["Capacitivo (Campo Eléctrico)", "Inductivo (Campo Magnético)"])),
+        ("modo", np.array(["Pulsado (PSWD)", "Continuo (CSWD)"])),
+        ("fase", _rango(0, 400, 10)),
+        ("frec_pulso", _rango(0, 1000, 10)),
+        ("potencia", _rango(0, 1000, 10)),
+    ),
+    "Infrarrojo": (("distancia", _rango(0, 100, 1)), ("tiempo", _rango(0, 60, 1))),
+}
+
+
+_COMPARACIONES = {
+    Minimo: lambda valores, limite: valores >= limite,
+    Maximo: lambda valores, limite: valores <= limite,
+    Exacto: lambda valores, limite: valores == limite,
+    Permitidos: lambda valores, limite: np.isin(valores, list(limite)),
+}
+
+
+def _familia(equipo):
+    return equipo.split(" (")[0]
+
+
+def _es_numerico(valores):
+    return np.issubdtype(valores.dtype, np.number)
+
+
+def barrer(restricciones, ejes, derivados=None, solo_bloqueantes=False):
+    # Cada eje se expande solo en su propia dimensión; NumPy hace el broadcast
+    n = len(ejes)
+    grilla = {}
+    for i, (campo, valores) in enumerate(ejes):
+        forma = [1] * n
+        forma[i] = len(valores)
+        grilla[campo] = valores.reshape(forma)
+    usados = {r.campo for r in restricciones}
+    for campo, calcular in (derivados or {}).items():
+        if campo in usados and campo not in grilla:
+            grilla[campo] = calcular(grilla)
+
+    mascara = np.ones(tuple(len(valores) for _, valores in ejes), dtype=bool)
+    for restriccion in restricciones:
+        if solo_bloqueantes and not restriccion.bloquea:
+            continue
+        mascara &= _COMPARACIONES[type(restriccion)](grilla[restriccion.campo], restriccion.limite)
+    return mascara
+
+
+class Region:
+    def __init__(self, ejes, mascara):
+        self.ejes = ejes
+        self.mascara = mascara
+        self._posicion = {campo: i for i, (campo, _) in enumerate(ejes)}
+
+    @property
+    def fraccion(self):
+        return float(self.mascara.mean())
+
+    def _indice(self, params):
+        indice = []
+        for campo, valores in self.ejes:
+            valor = params.get(campo, valores[0])
+            if _es_numerico(valores):
+                i = int(np.abs(valores - valor).argmin())
+            else:
+                coincide = np.flatnonzero(valores == valor)
+                i = int(coincide[0]) if len(coincide) else 0
+            indice.append(i)
+        return tuple(indice)
+
+    def contiene(self, params):
+        # Punto de la grilla más cercano a los params
+        return bool(self.mascara[self._indice(params)])
+
+    def distancia(self, params):
+        # Distancia normalizada (0 = dentro de la región) al punto aceptado más
+        # cercano: cada eje numérico se escala por su rango y un valor
+        # categórico distinto suma 1. Devuelve (distancia, params_del_punto).
+        if not self.mascara.any():
+            return float("inf"), None
+        n = len(self.ejes)
+        total = np.zeros((1,) * n)
+        for i, (campo, valores) in enumerate(self.ejes):
+            forma = [1] * n
+            forma[i] = len(valores)
+            valor = params.get(campo, valores[0])
+            if _es_numerico(valores):
+                escala = float(valores[-1] - valores[0]) or 1.0
+                d = ((valores - valor) / escala) ** 2
+            else:
+                d = (valores != valor).astype(float)
+            total = total + d.reshape(forma)
+        total = np.where(self.mascara, total, np.inf)
+        mejor = np.unravel_index(int(total.argmin()), total.shape)
+        punto = {campo: valores[i].item() for (campo, valores), i in zip(self.ejes, mejor)}
+        return float(np.sqrt(total[mejor])), punto
+
+    def mapa(self, campo_x, campo_y):
+        # Fracción de puntos aceptados por celda (campo_y, campo_x), promediando el resto de ejes
+        ix, iy = self._posicion[campo_x], self._posicion[campo_y]
+        otros = tuple(i for i in range(len(self.ejes)) if i not in (ix, iy))
+        proyeccion = self.mascara.mean(axis=otros) if otros else self.mascara.astype(float)
+        return proyeccion.T if ix < iy else proyeccion
+
+
+@lru_cache(maxsize=256)
+def _region(caso, equipo, solo_bloqueantes, version_casos):
+    familia = _familia(equipo)
+    ejes = GRILLAS[familia]
+    mascara = barrer(motor().restricciones(caso, equipo), ejes, dosis.funciones(familia), solo_bloqueantes)
+    mascara.setflags(write=False)
+    return Region(ejes, mascara)
+
+
+def region(caso, equipo, solo_bloqueantes=False):
+    # Región de aceptación con la grilla por defecto, calculada una vez por
+    # proceso (y de nuevo si el archivo de casos se recarga)
+    return _region(caso, equipo, solo_bloqueantes, DB_CASOS.version)
+
+
+def auditar():
+    # Fracción aceptada de cada (caso, equipo) con grilla; 0 indica reglas imposibles de cumplir
+    filas = []
+    for caso, equipo in motor().pares():
+        if _familia(equipo) not in GRILLAS:
+            continue
+        r = region(caso, equipo)
+        filas.append({
+            "caso": caso,
+            "equipo": equipo,
+            "fraccion": r.fraccion,
+            "fraccion_bloqueantes": region(caso, equipo, True).fraccion,
+            "restricciones": len(motor().restricciones(caso, equipo)),
+        })
+    return filas
@@ -0,0 +1,445 @@
+# =============================================================================
+# BENCHMARKS Y PRUEBA DE CARGA (ALUMNOS SIMULADOS CON AppTest)
+# =============================================================================
+# Ejecuta app.py sin navegador (AppTest de Streamlit) y mide:
+#   - formularios: latencia de cada re-ejecución y de "Validar" por equipo,
+#   - validacion:  validaciones por segundo sobre todos los casos de DB_CASOS,
+#   - feedback:    latencia del profesor IA contra stub_gemini.py (retardo y
+#                  tasa de error configurables), del cliente HTTP solo y de
+#                  punta a punta en la app (click en "Validar" hasta el
+#                  feedback en pantalla, separando los que fueron a la red),
+#   - carga:       N alumnos a la vez (en rampa) validando al azar, con
+#                  throughput, p50/p95/p99, errores y memoria por sesión
+#                  (tracemalloc).
+#
+# Ojo con "carga": AppTest no es seguro entre hilos, así que cada alumno corre
+# en su propio proceso con su propia copia de app.py (sus caches, sus
+# singletons de cache_resource y su GIL). Los números describen N apps de un
+# solo usuario compitiendo por la CPU de la máquina, no N sesiones sobre una
+# misma instancia de `streamlit run`; sirven para comparar corridas entre sí,
+# no para dimensionar una clase en un servidor.
+# Cada corrida se guarda como JSON en .bench/ para comparar en el tiempo:
+#
+#   python benchmark.py todo
+#   python benchmark.py carga --alumnos 1 5 10 20 --acciones 20
+#   python benchmark.py feedback --retardo 0.5 --tasa-error 0.1
+#   python benchmark.py todo --comparar .bench/20260101-120000.json
+#
+# La cache, el registro de intentos y el banco de feedback apuntan a un
+# directorio temporal, así que medir no ensucia los datos reales.
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+DIRECTORIO_RESULTADOS = ".bench"
+
+# (categoría, equipo en la barra lateral, subtipo de Farádica)
+EQUIPOS_UI = (
+    ("Electroterapia", "TENS", None),
+    ("Electroterapia", "Rusa", None),
+    ("Electroterapia", "TIF", None),
+    ("Electroterapia", "Farádica", "Rectangular"),
+    ("Termoterapia", "Ultrasonido", None),
+    ("Termoterapia", "Onda Corta", None),
+    ("Termoterapia", "Infrarrojo", None),
+)
+
+
+def estadisticas(segundos):
+    if not len(segundos):
+        return {"n": 0}
+    ms = np.asarray(segundos) * 1000
+    p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+    return {"n": len(ms), "media_ms": round(float(ms.mean()), 3), "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3)}
+
+
+def _cronometrar(accion):
+    t0 = time.perf_counter()
+    accion()
+    return time.perf_counter() - t0
+
+
+# =============================================================================
+# ENTORNO AISLADO (STUB DE GEMINI + RUTAS TEMPORALES)
+# =============================================================================
+def preparar_entorno(retardo=0.0, tasa_error=0.0, retardo_token=0.0):
+    from stub_gemini import servir
+
+    temporal = tempfile.mkdtemp(prefix="kine-bench-")
+    stub = servir(retardo=retardo, tasa_error=tasa_error, retardo_token=retardo_token)
+    os.environ.update(
+        GEMINI_API_KEY="bench",
+        GEMINI_BASE_URL=f"http://127.0.0.1:{stub.server_port}/v1beta",
+        GEMINI_RPS="1000",
+        KINE_CACHE_DIR=os.path.join(temporal, "cache"),
+        KINE_REGISTRO=os.path.join(temporal, "intentos.sqlite"),
+        KINE_BANCO=os.path.join(temporal, "banco.json.gz"),
+    )
+    os.environ.pop("KINE_METRICAS_PUERTO", None)
+    return stub
+
+
+# =============================================================================
+# SESIÓN SIMULADA (UN ALUMNO)
+# =============================================================================
+class Alumno:
+    def __init__(self, semilla=None, timeout=60):
+        from streamlit.testing.v1 import AppTest
+
+        self.azar = random.Random(semilla)
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.at.run()
+
+    def _widget(self, lista, etiqueta):
+        return next(w for w in lista if w.label == etiqueta)
+
+    def elegir(self, caso, categoria, equipo, subtipo=None):
+        barra = self.at.sidebar
+        self._widget(barra.selectbox, "Selecciona un Caso Clínico:").select(caso)
+        self.at.run()
+        self._widget(self.at.sidebar.radio, "Categoría:").set_value(categoria)
+        self.at.run()
+        self._widget(self.at.sidebar.selectbox, "Equipo:").select(equipo)
+        self.at.run()
+        if subtipo:
+            self._widget(self.at.sidebar.selectbox, "Tipo de Farádica:").select(subtipo)
+            self.at.run()
+
+    def llenar(self):
+        # Valores al azar dentro del rango de cada widget del formulario
+        for w in self.at.main.number_input:
+            minimo = w.min if w.min is not None else 0
+            maximo = w.max if w.max is not None else (w.value or 0) * 2 + 100
+            pasos = int((maximo - minimo) / w.step)
+            valor = minimo + self.azar.randint(0, pasos) * w.step
+            w.set_value(int(valor) if isinstance(w.value, int) else round(valor, 6))
+        for w in self.at.main.selectbox:
+            w.select(self.azar.choice(w.options))
+        for w in self.at.main.radio:
+            w.set_value(self.azar.choice(w.options))
+
+    def rerun(self):
+        return _cronometrar(self.at.run)
+
+    def validar(self):
+        boton = next(b for b in self.at.button if "Validar" in b.label)
+        segundos = _cronometrar(lambda: boton.click().run())
+        if self.at.exception:
+            raise RuntimeError(self.at.exception[0].message)
+        return segundos
+
+
+def _casos():
+    from casos import DB_CASOS
+    return DB_CASOS.ids()
+
+
+# =============================================================================
+# ESCENARIOS
+# =============================================================================
+def bench_formularios(repeticiones=20, semilla=0):
+    caso = _casos()[0]
+    resultados = {}
+    alumno = Alumno(semilla)
+    for categoria, equipo, subtipo in EQUIPOS_UI:
+        alumno.elegir(caso, categoria, equipo, subtipo)
+        reruns, validaciones = [], []
+        for _ in range(repeticiones):
+            alumno.llenar()
+            reruns.append(alumno.rerun())
+            validaciones.append(alumno.validar())
+        resultados[equipo] = {"rerun": estadisticas(reruns), "validar": estadisticas(validaciones)}
+        print(f"  {equipo:12s} rerun p50 {resultados[equipo]['rerun']['p50_ms']:8.2f} ms · "
+              f"validar p50 {resultados[equipo]['validar']['p50_ms']:8.2f} ms", file=sys.stderr)
+    return resultados
+
+
+def _params_al_azar(azar, familia):
+    from barrido import GRILLAS
+    import dosis
+
+    params = {campo: azar.choice(valores).item() for campo, valores in GRILLAS.get(familia, ())}
+    if familia == "Onda Corta":
+        params["media_resultante"] = dosis.potencia_media(params)
+    return params
+
+
+def bench_validacion(iteraciones=20000, semilla=0):
+    from validacion import EQUIPOS, _familia, motor, validar
+
+    azar = random.Random(semilla)
+    casos = _casos()
+    motor().compilar_todo()
+    muestras = [(caso, equipo) for caso in casos for equipo in EQUIPOS]
+    entradas = [(c, e, _params_al_azar(azar, _familia(e))) for c, e in (azar.choice(muestras) for _ in range(iteraciones))]
+
+    t0 = time.perf_counter()
+    for caso, equipo, params in entradas:
+        validar(caso, equipo, params)
+    total = time.perf_counter() - t0
+
+    por_caso = {}
+    for caso in casos:
+        tiempos = []
+        for equipo in EQUIPOS:
+            params = _params_al_azar(azar, _familia(equipo))
+            tiempos.append(_cronometrar(lambda: validar(caso, equipo, params)))
+        por_caso[caso] = estadisticas(tiempos)
+    resultado = {"casos": len(casos), "validaciones": iteraciones, "por_segundo": round(iteraciones / total),
+                 "us_por_validacion": round(1e6 * total / iteraciones, 3), "por_caso": por_caso}
+    print(f"  {resultado['por_segundo']} validaciones/s ({resultado['us_por_validacion']} µs c/u)", file=sys.stderr)
+    return resultado
+
+
+def _feedback_en_app(validaciones=20, semilla=0):
+    # Click en "Validar" hasta el feedback en pantalla. El medidor del cliente de
+    # la app (mismo proceso) dice si ese click fue a la red o salió del banco/cache
+    from metricas import METRICAS
+
+    def solicitudes():
+        return METRICAS.resumen()["medidores"].get("cliente_gemini", {}).get("solicitudes", 0)
+
+    alumno = Alumno(semilla)
+    con_red, sin_red = [], []
+    for _ in range(validaciones):
+        alumno.elegir(alumno.azar.choice(_casos()), *alumno.azar.choice(EQUIPOS_UI))
+        alumno.llenar()
+        antes = solicitudes()
+        segundos = alumno.validar()
+        (con_red if solicitudes() > antes else sin_red).append(segundos)
+    return {"con_red": estadisticas(con_red), "desde_banco_o_cache": estadisticas(sin_red)}
+
+
+def bench_feedback(solicitudes=200, concurrencia=16, stub=None, validaciones_app=20):
+    from cliente_gemini import ClienteGemini
+
+    cliente = ClienteGemini("bench", url_base=os.environ["GEMINI_BASE_URL"], max_conexiones=concurrencia)
+    primer_token, totales, errores = [], [], 0
+    lock = threading.Lock()
+
+    def pedir(i):
+        nonlocal errores
+        t0 = time.perf_counter()
+        try:
+            for j, _ in enumerate(cliente.stream(f"bench {i}")):
+                if j == 0:
+                    t1 = time.perf_counter() - t0
+            with lock:
+                primer_token.append(t1)
+                totales.append(time.perf_counter() - t0)
+        except Exception:
+            with lock:
+                errores += 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        list(hilos.map(pedir, range(solicitudes)))
+    duracion = time.perf_counter() - t0
+    resultado = {"solicitudes": solicitudes, "concurrencia": concurrencia, "errores": errores,
+                 "por_segundo": round(solicitudes / duracion, 2), "primer_token": estadisticas(primer_token),
+                 "total": estadisticas(totales), "cliente": cliente.estadisticas()}
+    if stub is not None:
+        resultado["stub"] = {"retardo": stub.retardo, "tasa_error": stub.tasa_error, "solicitudes": stub.solicitudes}
+    print(f"  cliente: {resultado['por_segundo']} req/s · primer token p50 {resultado['primer_token'].get('p50_ms')} ms · "
+          f"{errores} errores", file=sys.stderr)
+    if validaciones_app:
+        resultado["en_app"] = _feedback_en_app(validaciones_app)
+        print(f"  en la app: con red p50 {resultado['en_app']['con_red'].get('p50_ms')} ms "
+              f"(n={resultado['en_app']['con_red']['n']}) · desde banco/cache p50 "
+              f"{resultado['en_app']['desde_banco_o_cache'].get('p50_ms')} ms", file=sys.stderr)
+    return resultado
+
+
+def _memoria_por_sesion(n=5):
+    # Crece la memoria del proceso al mantener n sesiones vivas. Antes se pasa
+    # una sesión por todos los equipos para que imports, casos compilados y
+    # caches compartidos no se cuenten como memoria de cada alumno.
+    calentamiento = Alumno(-1)
+    for i, equipo_ui in enumerate(EQUIPOS_UI):
+        calentamiento.elegir(_casos()[i % len(_casos())], *equipo_ui)
+        calentamiento.llenar()
+        calentamiento.validar()
+    del calentamiento
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    alumnos = []
+    for i in range(n):
+        alumno = Alumno(i)
+        alumno.elegir(_casos()[i % len(_casos())], *EQUIPOS_UI[i % len(EQUIPOS_UI)])
+        alumno.llenar()
+        alumno.validar()
+        alumnos.append(alumno)
+    gc.collect()
+    crecimiento = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, "filename"))
+    tracemalloc.stop()
+    return round(crecimiento / n / 1024, 1)
+
+
+def _simular_alumno(i, acciones):
+    # Corre en un proceso aparte (hereda el entorno de preparar_entorno). Un
+    # error cuenta para el alumno y se sigue con la próxima acción, así que un
+    # alumno que falla no tumba el escalón. Devuelve (latencias, errores,
+    # primer error, inicio y fin en time.time() para medir el escalón completo).
+    latencias, errores, primero = [], 0, None
+    try:
+        alumno = Alumno(i)
+    except Exception as e:
+        return latencias, acciones, f"{type(e).__name__}: {e}", None, None
+    inicio = time.time()
+    azar = alumno.azar
+    for _ in range(acciones):
+        try:
+            alumno.elegir(azar.choice(_casos()), *azar.choice(EQUIPOS_UI))
+            alumno.llenar()
+            latencias.append(alumno.validar())
+        except Exception as e:
+            errores += 1
+            primero = primero or f"{type(e).__name__}: {e}"
+    return latencias, errores, primero, inicio, time.time()
+
+
+def bench_carga(alumnos=(1, 5, 10, 20), acciones=10):
+    # Un proceso por alumno: ver la advertencia al inicio del archivo
+    escalones = []
+    contexto = multiprocessing.get_context("spawn")
+    for n in alumnos:
+        latencias, errores, primeros, inicios, fines = [], 0, [], [], []
+        with ProcessPoolExecutor(max_workers=n, mp_context=contexto) as procesos:
+            futuros = [procesos.submit(_simular_alumno, i, acciones) for i in range(n)]
+            for futuro in futuros:
+                try:
+                    suyas, fallidas, primero, inicio, fin = futuro.result()
+                except Exception as e:  # el proceso del alumno murió
+                    suyas, fallidas, primero, inicio, fin = [], acciones, f"{type(e).__name__}: {e}", None, None
+                latencias += suyas
+                errores += fallidas
+                if primero:
+                    primeros.append(primero)
+                if inicio is not None:
+                    inicios.append(inicio)
+                    fines.append(fin)
+        # Desde que el primer alumno quedó listo hasta que terminó el último (sin el arranque de procesos)
+        duracion = max(fines) - min(inicios) if inicios else 0.0
+        escalon = {"alumnos": n, "modo": "un proceso por alumno", "acciones": len(latencias), "errores": errores, "duracion_s": round(duracion, 2),
+                   "validaciones_por_s": round(len(latencias) / duracion, 2) if duracion else 0.0,
+                   "validar": estadisticas(latencias)}
+        if primeros:
+            escalon["primer_error"] = primeros[0]
+        escalones.append(escalon)
+        print(f"  {n:3d} procesos: {escalon['validaciones_por_s']:7.2f} val/s · p50 {escalon['validar'].get('p50_ms', 0):8.1f} ms "
+              f"· p95 {escalon['validar'].get('p95_ms', 0):8.1f} ms · p99 {escalon['validar'].get('p99_ms', 0):8.1f} ms "
+              f"· {errores} errores", file=sys.stderr)
+    try:
+        kib = _memoria_por_sesion()
+        print(f"  memoria por sesión: {kib} KiB", file=sys.stderr)
+    except Exception as e:
+        kib = None
+        print(f"  memoria por sesión: no se pudo medir ({type(e).__name__}: {e})", file=sys.stderr)
+    return {"escalones": escalones, "memoria_por_sesion_kib": kib}
+
+
+# =============================================================================
+# RESULTADOS
+# =============================================================================
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(APP), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def guardar(resultados, directorio=DIRECTORIO_RESULTADOS):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    return ruta
+
+
+def _aplanar(datos, prefijo=""):
+    for clave, valor in datos.items():
+        if isinstance(valor, dict):
+            yield from _aplanar(valor, f"{prefijo}{clave}.")
+        elif isinstance(valor, (int, float)) and (clave.endswith("_ms") or clave.endswith("_por_s")
+                                                  or clave in ("por_segundo", "memoria_por_sesion_kib")):
+            yield prefijo + clave, valor
+
+
+def comparar(anterior, actual):
+    # Imprime las métricas que cambiaron más de 10% respecto de una corrida guardada
+    previas = dict(_aplanar(anterior["escenarios"]))
+    print(f"Comparación con {anterior.get('fecha')} (commit {anterior.get('commit')}):")
+    for nombre, valor in _aplanar(actual["escenarios"]):
+        previo = previas.get(nombre)
+        if not previo:
+            continue
+        cambio = (valor - previo) / previo
+        if abs(cambio) >= 0.10:
+            print(f"  {nombre:60s} {previo:>12.3f} -> {valor:>12.3f} ({cambio:+.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks y prueba de carga del simulador.")
+    parser.add_argument("escenario", choices=["formularios", "validacion", "feedback", "carga", "todo"])
+    parser.add_argument("--repeticiones", type=int, default=20, help="re-ejecuciones por formulario")
+    parser.add_argument("--iteraciones", type=int, default=20000, help="validaciones en el benchmark de validación")
+    parser.add_argument("--solicitudes", type=int, default=200, help="solicitudes al stub de Gemini")
+    parser.add_argument("--concurrencia", type=int, default=16, help="solicitudes simultáneas al stub")
+    parser.add_argument("--validaciones-app", type=int, default=20, help="clicks en Validar para el feedback de punta a punta")
+    parser.add_argument("--retardo", type=float, default=0.2, help="retardo del stub antes de responder (s)")
+    parser.add_argument("--retardo-token", type=float, default=0.01, help="retardo del stub entre trozos (s)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 500 del stub")
+    parser.add_argument("--alumnos", type=int, nargs="+", default=[1, 5, 10, 20], help="rampa de alumnos (un proceso cada uno)")
+    parser.add_argument("--acciones", type=int, default=10, help="validaciones por alumno en cada escalón")
+    parser.add_argument("--salida", default=DIRECTORIO_RESULTADOS)
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args(argv)
+
+    stub = preparar_entorno(args.retardo, args.tasa_error, args.retardo_token)
+    escenarios = {}
+    elegidos = ("formularios", "validacion", "feedback", "carga") if args.escenario == "todo" else (args.escenario,)
+    for nombre in elegidos:
+        print(f"[{nombre}]", file=sys.stderr)
+        if nombre == "formularios":
+            escenarios[nombre] = bench_formularios(args.repeticiones)
+        elif nombre == "validacion":
+            escenarios[nombre] = bench_validacion(args.iteraciones)
+        elif nombre == "feedback":
+            escenarios[nombre] = bench_feedback(args.solicitudes, args.concurrencia, stub, args.validaciones_app)
+        else:
+            escenarios[nombre] = bench_carga(args.alumnos, args.acciones)
+
+    resultados = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "argumentos": {k: v for k, v in vars(args).items() if k not in ("salida", "comparar")},
+        "escenarios": escenarios,
+    }
+    print(f"Resultados en {guardar(resultados, args.salida)}", file=sys.stderr)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(json.load(f), resultados)
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
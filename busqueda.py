@@ -0,0 +1,183 @@
+# =============================================================================
+# BÚSQUEDA Y SIMILITUD DE CASOS (ÍNDICE INVERTIDO + TF-IDF)
+# =============================================================================
+# Indexa la patología, la descripción clínica y la solución de cada caso de
+# DB_CASOS. El índice se arma una vez por versión del archivo de casos y se
+# comparte entre sesiones; las consultas solo recorren las listas de los
+# términos buscados, así que responden en microsegundos aunque haya miles de
+# casos:
+#   - buscar("dolor agudo")  -> ids que contienen todos los términos, por relevancia
+#   - similares(id_caso)     -> casos más parecidos por coseno TF-IDF
+#
+# Los vectores TF-IDF se guardan normalizados en formato disperso (arreglos
+# NumPy por fila y por término) en vez de una matriz densa: con miles de casos
+# y un vocabulario de miles de palabras la densa ocuparía cientos de MB.
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from casos import DB_CASOS
+
+PALABRAS_VACIAS = frozenset("""
+a al ante con contra de del desde el en entre es esta este hace hacia hasta la las le lo los mas muy no o
+para pero por que se sin sobre su sus un una uno y ya hrs año años presenta paciente
+""".split())
+
+_PALABRA = re.compile(r"[a-z0-9]+(?::[0-9]+)*")
+
+
+def tokenizar(texto):
+    # Minúsculas, sin tildes ni palabras vacías; "dolores" y "dolor" cuentan igual
+    texto = unicodedata.normalize("NFKD", texto.casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    tokens = []
+    for palabra in _PALABRA.findall(texto):
+        if len(palabra) < 2 or palabra in PALABRAS_VACIAS:
+            continue
+        if len(palabra) > 4 and palabra.endswith("es") and palabra[-3] not in "aeiou":
+            palabra = palabra[:-2]
+        elif len(palabra) > 3 and palabra.endswith("s"):
+            palabra = palabra[:-1]
+        tokens.append(palabra)
+    return tokens
+
+
+def _texto_solucion(solucion):
+    # Equipos y valores textuales de las reglas (ej "6:6", "Capacitivo")
+    partes = list(solucion.get("equipos", []))
+    for reglas in solucion.values():
+        if isinstance(reglas, dict):
+            for valor in reglas.values():
+                valores = valor if isinstance(valor, list) else [valor]
+                partes += [v for v in valores if isinstance(v, str)]
+    return " ".join(partes)
+
+
+def _terminos(caso):
+    terminos = Counter(tokenizar(caso.get("patologia") or ""))
+    for termino in terminos:
+        terminos[termino] *= 2  # la patología pesa más que el resto del texto
+    terminos.update(tokenizar(caso["desc"]))
+    terminos.update(tokenizar(_texto_solucion(caso["solucion"])))
+    return terminos
+
+
+class IndiceCasos:
+    def __init__(self, ids, terminos_por_caso):
+        self.ids = tuple(ids)
+        self._fila = {id_caso: i for i, id_caso in enumerate(self.ids)}
+        self.vocabulario = sorted({t for terminos in terminos_por_caso for t in terminos})
+        columna = {t: j for j, t in enumerate(self.vocabulario)}
+        n = len(self.ids)
+
+        # Filas dispersas (CSR): términos y pesos de cada caso
+        filas, columnas, frecuencias = [], [], []
+        for i, terminos in enumerate(terminos_por_caso):
+            for termino, frecuencia in terminos.items():
+                filas.append(i)
+                columnas.append(columna[termino])
+                frecuencias.append(frecuencia)
+        filas = np.asarray(filas, dtype=np.int32)
+        columnas = np.asarray(columnas, dtype=np.int32)
+        frecuencias = np.asarray(frecuencias, dtype=np.float32)
+
+        df = np.bincount(columnas, minlength=len(self.vocabulario))
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        pesos = (1 + np.log(frecuencias)) * self.idf[columnas]
+        normas = np.sqrt(np.bincount(filas, weights=pesos ** 2, minlength=n))
+        pesos = (pesos / normas[filas]).astype(np.float32)
+
+        self._inicio_fila = np.concatenate(([0], np.cumsum(np.bincount(filas, minlength=n))))
+        self._columnas = columnas
+        self._pesos = pesos
+
+        # Índice invertido (las mismas entradas ordenadas por término)
+        orden = np.argsort(columnas, kind="stable")
+        self._inicio_termino = np.concatenate(([0], np.cumsum(df)))
+        self._casos_termino = filas[orden]
+        self._pesos_termino = pesos[orden]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _expandir(self, token):
+        # Término exacto o, si no existe, todos los que empiezan así (búsqueda mientras se escribe)
+        i = bisect_left(self.vocabulario, token)
+        if i < len(self.vocabulario) and self.vocabulario[i] == token:
+            return [i]
+        columnas = []
+        while i < len(self.vocabulario) and self.vocabulario[i].startswith(token):
+            columnas.append(i)
+            i += 1
+        return columnas
+
+    def _puntajes(self, columnas, pesos):
+        # Producto punto contra todos los casos recorriendo solo las listas de
+        # los términos dados (todas juntas, sin un ciclo por término)
+        columnas = np.asarray(columnas, dtype=np.int64)
+        inicios = self._inicio_termino[columnas]
+        largos = self._inicio_termino[columnas + 1] - inicios
+        desplazamiento = np.repeat(inicios - np.cumsum(largos) + largos, largos)
+        posiciones = desplazamiento + np.arange(int(largos.sum()))
+        pesos = np.repeat(np.asarray(pesos, dtype=np.float32), largos) * self._pesos_termino[posiciones]
+        return np.bincount(self._casos_termino[posiciones], weights=pesos, minlength=len(self.ids))
+
+    def _mejores(self, puntajes, candidatos, limite):
+        candidatos = candidatos[puntajes[candidatos] > 0]
+        if limite is not None and len(candidatos) > limite:
+            candidatos = candidatos[np.argpartition(-puntajes[candidatos], limite - 1)[:limite]]
+        # Empates en el orden del archivo
+        candidatos = candidatos[np.lexsort((candidatos, -puntajes[candidatos]))]
+        return [self.ids[i] for i in candidatos]
+
+    def buscar(self, consulta, limite=None):
+        # Casos que contienen todos los términos de la consulta, más relevantes primero
+        grupos = [self._expandir(token) for token in dict.fromkeys(tokenizar(consulta))]
+        if not grupos:
+            return list(self.ids[:limite] if limite else self.ids)
+        if not all(grupos):
+            return []
+        coincidencias = np.zeros(len(self.ids), dtype=np.int32)
+        columnas, pesos = [], []
+        for grupo in grupos:
+            presentes = np.zeros(len(self.ids), dtype=bool)
+            for j in grupo:
+                presentes[self._casos_termino[self._inicio_termino[j]:self._inicio_termino[j + 1]]] = True
+                columnas.append(j)
+                pesos.append(self.idf[j])
+            coincidencias += presentes
+        candidatos = np.flatnonzero(coincidencias == len(grupos))
+        return self._mejores(self._puntajes(columnas, pesos), candidatos, limite)
+
+    def similares(self, id_caso, limite=5):
+        # Casos más parecidos a `id_caso` (sin incluirlo)
+        i = self._fila.get(id_caso)
+        if i is None:
+            return []
+        inicio, fin = self._inicio_fila[i], self._inicio_fila[i + 1]
+        puntajes = self._puntajes(self._columnas[inicio:fin], self._pesos[inicio:fin])
+        puntajes[i] = 0
+        return self._mejores(puntajes, np.arange(len(self.ids)), limite)
+
+
+@lru_cache(maxsize=2)
+def _indice(version_casos):
+    ids = DB_CASOS.ids()
+    return IndiceCasos(ids, [_terminos(DB_CASOS[id_caso]) for id_caso in ids])
+
+
+def indice():
+    # Se arma una vez por proceso (y de nuevo si el archivo de casos se recarga)
+    return _indice(DB_CASOS.version)
+
+
+def buscar(consulta, limite=None):
+    return indice().buscar(consulta, limite)
+
+
+def similares(id_caso, limite=5):
+    return indice().similares(id_caso, limite)
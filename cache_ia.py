@@ -0,0 +1,139 @@
+# =============================================================================
+# CACHE DE FEEDBACK DE IA (MEMORIA + DISCO)
+# =============================================================================
+# El feedback del profesor IA depende casi solo del caso, del equipo y del
+# resultado de la validación técnica, así que se guarda bajo esa firma:
+#   - Nivel 1: LRU en memoria, compartido por todas las sesiones del proceso,
+#     con el mismo TTL que el disco (cada entrada recuerda cuándo se creó).
+#   - Nivel 2: SQLite en disco, con TTL y tope de filas (se eliminan las menos
+#     usadas), compartido entre procesos y reinicios.
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def clave_feedback(caso, equipo, resultado):
+    # Firma normalizada: no depende del orden de los fallos ni de los valores exactos
+    estado = "ok" if resultado.es_correcto else "mal"
+    return "|".join((caso.strip(), equipo.strip(), estado, ",".join(sorted(resultado.fallos))))
+
+
+class CacheFeedback:
+    def __init__(self, ruta=None, capacidad=512, ttl=7 * 24 * 3600, max_filas=50000):
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.max_filas = max_filas
+        self._memoria = OrderedDict()  # clave -> (texto, creado)
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+        self._db = None
+        if ruta:
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+            self._db = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS feedback ("
+                " clave TEXT PRIMARY KEY, texto TEXT NOT NULL, creado REAL NOT NULL, usado REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS feedback_usado ON feedback (usado)")
+
+    # -- Nivel 1: memoria --
+    def _recordar(self, clave, texto, creado):
+        self._memoria[clave] = (texto, creado)
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.capacidad:
+            self._memoria.popitem(last=False)
+
+    # -- Nivel 2: disco --
+    def _leer_disco(self, clave, ahora):
+        fila = self._db.execute("SELECT texto, creado FROM feedback WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            return None
+        texto, creado = fila
+        if ahora - creado > self.ttl:
+            self._db.execute("DELETE FROM feedback WHERE clave = ?", (clave,))
+            return None
+        self._db.execute("UPDATE feedback SET usado = ? WHERE clave = ?", (ahora, clave))
+        return texto, creado
+
+    def _escribir_disco(self, clave, texto, ahora):
+        self._db.execute(
+            "INSERT OR REPLACE INTO feedback (clave, texto, creado, usado) VALUES (?, ?, ?, ?)",
+            (clave, texto, ahora, ahora),
+        )
+        # Contar filas es O(n) en SQLite: se revisa el tope cada cierto número de escrituras
+        self._escrituras += 1
+        if self._escrituras % 100 == 0:
+            self._podar(ahora)
+
+    def _podar(self, ahora):
+        self._db.execute("DELETE FROM feedback WHERE creado < ?", (ahora - self.ttl,))
+        (filas,) = self._db.execute("SELECT COUNT(*) FROM feedback").fetchone()
+        if filas > self.max_filas:
+            sobrantes = filas - int(self.max_filas * 0.9)
+            self._db.execute(
+                "DELETE FROM feedback WHERE clave IN (SELECT clave FROM feedback ORDER BY usado LIMIT ?)",
+                (sobrantes,),
+            )
+
+    # -- API pública --
+    def obtener(self, clave):
+        with self._lock:
+            ahora = time.time()
+            entrada = self._memoria.get(clave)
+            if entrada is not None:
+                texto, creado = entrada
+                if ahora - creado <= self.ttl:
+                    self._memoria.move_to_end(clave)
+                    self.hits_memoria += 1
+                    return texto
+                del self._memoria[clave]  # vencida: el disco tampoco la va a entregar
+            if self._db is not None:
+                fila = self._leer_disco(clave, ahora)
+                if fila is not None:
+                    self._recordar(clave, *fila)
+                    self.hits_disco += 1
+                    return fila[0]
+            self.misses += 1
+            return None
+
+    def guardar(self, clave, texto):
+        with self._lock:
+            ahora = time.time()
+            self._recordar(clave, texto, ahora)
+            if self._db is not None:
+                self._escribir_disco(clave, texto, ahora)
+
+    def calentar(self, entradas=None):
+        # Sin entradas, sube a memoria lo más usado recientemente en disco;
+        # con entradas, guarda los pares (clave, texto) entregados.
+        if entradas is not None:
+            for clave, texto in entradas:
+                self.guardar(clave, texto)
+            return
+        if self._db is None:
+            return
+        with self._lock:
+            filas = self._db.execute(
+                "SELECT clave, texto, creado FROM feedback WHERE creado >= ? ORDER BY usado DESC LIMIT ?",
+                (time.time() - self.ttl, self.capacidad),
+            ).fetchall()
+            for clave, texto, creado in reversed(filas):
+                self._recordar(clave, texto, creado)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                "hits_memoria": self.hits_memoria,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "tasa_acierto": (self.hits_memoria + self.hits_disco) / total if total else 0.0,
+                "en_memoria": len(self._memoria),
+            }
@@ -0,0 +1,132 @@
+# =============================================================================
+# CALIFICACIÓN MASIVA (SIN INTERFAZ)
+# =============================================================================
+# Corrige archivos completos de entregas con el mismo motor que usa el botón
+# "Validar Tratamiento". Uso:
+#
+#   python calificacion.py entregas.jsonl -o resultados.jsonl --procesos 8
+#
+# Cada entrega (una línea JSONL o una fila CSV) trae: caso, equipo, subtipo,
+# params (objeto JSON; en CSV, la columna va serializada) y justificacion.
+# La entrada se lee en streaming y los resultados se escriben a medida que
+# llegan, con un número acotado de lotes en vuelo para no crecer en memoria.
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from multiprocessing import Pool
+
+from validacion import nombre_equipo, validar
+
+
+def calificar_entrega(entrega):
+    # Una entrega mal formada produce una fila con "error" en vez de detener el archivo
+    if "_error" in entrega:
+        return {"id": entrega.get("id"), "error": entrega["_error"]}
+    equipo = nombre_equipo(entrega.get("equipo", ""), entrega.get("subtipo") or None)
+    salida = {"id": entrega.get("id"), "caso": entrega.get("caso"), "equipo": equipo}
+    params = entrega.get("params") or {}
+    try:
+        if not isinstance(params, dict):
+            raise TypeError(f"params debe ser un objeto JSON, no {type(params).__name__}")
+        resultado = validar(entrega["caso"], equipo, params)
+    except KeyError as e:
+        salida["error"] = f"Caso o campo desconocido: {e}"
+        return salida
+    except (TypeError, ValueError) as e:
+        salida["error"] = f"Parámetros inválidos: {e}"
+        return salida
+    salida.update({
+        "es_correcto": resultado.es_correcto,
+        "equipo_valido": resultado.equipo_valido,
+        "fallos": list(resultado.fallos),
+        "feedback": resultado.texto,
+    })
+    return salida
+
+
+def _calificar_lote(lote):
+    return [calificar_entrega(entrega) for entrega in lote]
+
+
+# -- Lectura en streaming --
+def leer_entregas(ruta):
+    with open(ruta, encoding="utf-8", newline="") as f:
+        if ruta.lower().endswith(".csv"):
+            for n, fila in enumerate(csv.DictReader(f), start=1):
+                try:
+                    fila["params"] = json.loads(fila.get("params") or "{}")
+                except ValueError as e:
+                    fila = {"id": fila.get("id") or n, "_error": f"Columna params no es JSON válido: {e}"}
+                fila.setdefault("id", n)
+                yield fila
+        else:
+            for n, linea in enumerate(f, start=1):
+                if not linea.strip():
+                    continue
+                try:
+                    entrega = json.loads(linea)
+                except ValueError as e:
+                    entrega = {"_error": f"Línea {n} no es JSON válido: {e}"}
+                if not isinstance(entrega, dict):
+                    entrega = {"_error": f"Línea {n} no es un objeto JSON"}
+                entrega.setdefault("id", n)
+                yield entrega
+
+
+def _lotes(entregas, tam_lote):
+    lote = []
+    for entrega in entregas:
+        lote.append(entrega)
+        if len(lote) >= tam_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def calificar_archivo(entrada, salida, procesos=None, tam_lote=500):
+    procesos = procesos or os.cpu_count() or 1
+    max_en_vuelo = 2 * procesos
+    total = 0
+
+    with open(salida, "w", encoding="utf-8") as out:
+        def escribir(resultados):
+            nonlocal total
+            for r in resultados:
+                out.write(json.dumps(r, ensure_ascii=False) + "\n")
+            total += len(resultados)
+
+        lotes = _lotes(leer_entregas(entrada), tam_lote)
+        if procesos == 1:
+            for lote in lotes:
+                escribir(_calificar_lote(lote))
+            return total
+
+        with Pool(procesos) as pool:
+            pendientes = deque()
+            for lote in lotes:
+                pendientes.append(pool.apply_async(_calificar_lote, (lote,)))
+                if len(pendientes) >= max_en_vuelo:
+                    escribir(pendientes.popleft().get())
+            while pendientes:
+                escribir(pendientes.popleft().get())
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Califica un archivo de entregas (JSONL o CSV).")
+    parser.add_argument("entrada", help="Archivo .jsonl o .csv con las entregas")
+    parser.add_argument("-o", "--salida", default="resultados.jsonl", help="Archivo JSONL de resultados")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--lote", type=int, default=500, help="Entregas por lote enviado a cada proceso")
+    args = parser.parse_args(argv)
+
+    total = calificar_archivo(args.entrada, args.salida, args.procesos, args.lote)
+    print(f"{total} entregas calificadas -> {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# =============================================================================
+# BASE DE DATOS DE CASOS (ALMACÉN EN ARCHIVO CON ÍNDICE)
+# =============================================================================
+# Los casos viven en data/casos.jsonl, un caso por línea:
+#   {"id": ..., "curso": ..., "patologia": ..., "desc": ..., "solucion": {...}}
+# Cada caso define su descripción clínica ("desc") y las reglas de la solución
+# esperada ("solucion"). Las reglas se compilan en validacion.py.
+#
+# El archivo no se carga entero: solo se indexa (id -> posición en bytes, más
+# índices por curso, equipo y patología) y cada caso se lee y decodifica recién
+# cuando se pide. El índice se guarda junto al archivo (.idx) para no re-escanearlo en
+# cada arranque, y si el archivo cambia se recarga solo, sin reiniciar el
+# servidor. DB_CASOS es una instancia compartida por todo el proceso y se usa
+# como un diccionario de solo lectura.
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+
+_log = logging.getLogger(__name__)
+
+RUTA_CASOS = os.environ.get("KINE_CASOS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "casos.jsonl"))
+
+
+def _normalizar(texto):
+    return texto.strip().casefold()
+
+
+class _Indice:
+    # Foto inmutable del archivo: se reemplaza entera al recargar. Mantiene
+    # abierto el archivo que indexó, así que un reemplazo atómico (os.replace)
+    # no afecta a las lecturas en curso.
+    def __init__(self, version, firma, archivo, ids, posiciones, por_curso, por_equipo, por_patologia):
+        self.version = version
+        self.firma = firma
+        self.archivo = archivo
+        self._lock = threading.Lock()
+        self.ids = ids
+        self.posiciones = posiciones
+        self.por_curso = por_curso
+        self.por_equipo = por_equipo
+        self.por_patologia = por_patologia
+
+    def leer(self, inicio, fin):
+        with self._lock:
+            self.archivo.seek(inicio)
+            return self.archivo.read(fin - inicio)
+
+
+class AlmacenCasos(Mapping):
+    def __init__(self, ruta, intervalo_revision=1.0):
+        self.ruta = ruta
+        self.intervalo_revision = intervalo_revision
+        self._lock = threading.Lock()
+        self._revisado = 0.0
+        self._indice = None
+        self._firma_invalida = None  # firma de la última versión del archivo que no se pudo leer
+
+    # -- Carga e índice --
+    def _firma_archivo(self):
+        estado = os.stat(self.ruta)
+        return [estado.st_mtime_ns, estado.st_size]
+
+    def _escanear(self, archivo):
+        ids, posiciones = [], []
+        por_curso, por_equipo, por_patologia = {}, {}, {}
+        archivo.seek(0)
+        inicio = 0
+        for linea in archivo:
+            fin = inicio + len(linea.rstrip(b"\r\n"))
+            if linea.strip():
+                caso = json.loads(linea)
+                n = len(ids)
+                ids.append(caso["id"])
+                posiciones.append([inicio, fin])
+                por_curso.setdefault(_normalizar(caso.get("curso", "")), []).append(n)
+                por_patologia.setdefault(_normalizar(caso.get("patologia", "")), []).append(n)
+                for equipo in caso["solucion"].get("equipos", []):
+                    por_equipo.setdefault(equipo, []).append(n)
+            inicio += len(linea)
+        return {"ids": ids, "posiciones": posiciones, "curso": por_curso, "equipo": por_equipo, "patologia": por_patologia}
+
+    def _cargar(self, version):
+        archivo = open(self.ruta, "rb")
+        try:
+            return self._indexar(archivo, version)
+        except BaseException:
+            archivo.close()
+            raise
+
+    def _indexar(self, archivo, version):
+        estado = os.fstat(archivo.fileno())
+        firma = [estado.st_mtime_ns, estado.st_size]
+        ruta_indice = self.ruta + ".idx"
+
+        guardado = None
+        try:
+            with open(ruta_indice, encoding="utf-8") as f:
+                guardado = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if not guardado or guardado.get("firma") != firma:
+            guardado = self._escanear(archivo)
+            guardado["firma"] = firma
+            try:
+                temporal = f"{ruta_indice}.{os.getpid()}.tmp"
+                with open(temporal, "w", encoding="utf-8") as f:
+                    json.dump(guardado, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(temporal, ruta_indice)
+            except OSError:
+                pass  # sin permisos de escritura: se re-escanea en el próximo arranque
+
+        ids = tuple(guardado["ids"])
+        posiciones = {id_caso: tuple(p) for id_caso, p in zip(ids, guardado["posiciones"])}
+
+        def a_ids(grupos):
+            return {clave: tuple(ids[n] for n in ns) for clave, ns in grupos.items()}
+
+        return _Indice(version, firma, archivo, ids, posiciones,
+                       a_ids(guardado["curso"]), a_ids(guardado["equipo"]), a_ids(guardado["patologia"]))
+
+    def _actual(self):
+        # Revisa el archivo a lo más una vez por intervalo; si cambió, recarga
+        indice = self._indice
+        ahora = time.monotonic()
+        if indice is not None and ahora - self._revisado < self.intervalo_revision:
+            return indice
+        with self._lock:
+            indice = self._indice
+            try:
+                firma = self._firma_archivo()
+                cambiado = indice is None or firma not in (indice.firma, self._firma_invalida)
+            except OSError:
+                # Archivo a medio reemplazar: se sigue con la foto actual (sin foto, _cargar
+                # levanta el error en vez de devolver un índice vacío)
+                cambiado = indice is None
+            if cambiado:
+                try:
+                    self._indice = indice = self._cargar(indice.version + 1 if indice else 1)
+                    _decodificar.cache_clear()
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    # Línea mal formada: se sigue sirviendo la foto anterior y no se
+                    # vuelve a intentar hasta que el archivo cambie otra vez
+                    if indice is None:
+                        raise
+                    self._firma_invalida = firma
+                    _log.exception("No se pudo recargar %s; se mantiene la versión %s", self.ruta, indice.version)
+            self._revisado = ahora
+        return indice
+
+    @property
+    def version(self):
+        # Cambia cada vez que el archivo se recarga (útil como parte de llaves de cache)
+        return self._actual().version
+
+    # -- Lectura --
+    def ids(self):
+        return self._actual().ids
+
+    def __getitem__(self, id_caso):
+        indice = self._actual()
+        return _decodificar(indice, id_caso)
+
+    def __contains__(self, id_caso):
+        return id_caso in self._actual().posiciones
+
+    def __iter__(self):
+        return iter(self._actual().ids)
+
+    def __len__(self):
+        return len(self._actual().ids)
+
+    def buscar(self, curso=None, equipo=None, patologia=None):
+        # Ids que cumplen todos los filtros dados, en el orden del archivo
+        indice = self._actual()
+        grupos = []
+        if curso is not None:
+            grupos.append(indice.por_curso.get(_normalizar(curso), ()))
+        if equipo is not None:
+            grupos.append(indice.por_equipo.get(equipo, ()))
+        if patologia is not None:
+            grupos.append(indice.por_patologia.get(_normalizar(patologia), ()))
+        if not grupos:
+            return indice.ids
+        comunes = set(grupos[0]).intersection(*grupos[1:])
+        return tuple(id_caso for id_caso in min(grupos, key=len) if id_caso in comunes)
+
+
+@lru_cache(maxsize=1024)
+def _decodificar(indice, id_caso):
+    # La llave incluye la foto del índice: al recargar, las entradas viejas dejan de usarse
+    inicio, fin = indice.posiciones[id_caso]
+    caso = json.loads(indice.leer(inicio, fin))
+    return {"desc": caso["desc"], "solucion": caso["solucion"], "curso": caso.get("curso"), "patologia": caso.get("patologia")}
+
+
+DB_CASOS = AlmacenCasos(RUTA_CASOS)
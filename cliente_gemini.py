@@ -0,0 +1,229 @@
+# =============================================================================
+# CLIENTE HTTP DE GEMINI (POOL, STREAMING Y DEDUPLICACIÓN)
+# =============================================================================
+# Un solo cliente por proceso, compartido por todas las sesiones:
+#   - Reutiliza conexiones keep-alive (requests.Session con pool).
+#   - Pide streamGenerateContent (SSE) y entrega el texto a medida que llega.
+#   - Si el modelo principal responde 404/429/5xx o no conecta, pasa de
+#     inmediato al modelo de respaldo; si acepta la conexión pero no entrega
+#     el primer trozo en `espera_primer_byte` segundos, lanza también el
+#     respaldo y se queda con el que responda primero.
+#   - Prompts idénticos en vuelo se atienden con una sola solicitud upstream.
+#   - Un token bucket compartido limita las solicitudes por segundo.
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+URL_BASE = "https://generativelanguage.googleapis.com/v1beta"
+MODELOS = ("gemini-1.5-flash", "gemini-pro")
+REINTENTABLES = {404, 429, 500, 502, 503, 504}
+
+
+class ErrorGemini(Exception):
+    def __init__(self, status, texto):
+        super().__init__(f"{status}: {texto}")
+        self.status = status
+        self.texto = texto
+
+
+class LimiteTokens:
+    def __init__(self, por_segundo, rafaga):
+        self.tasa = por_segundo
+        self.capacidad = rafaga
+        self._tokens = float(rafaga)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def tomar(self, espera_max=0.0):
+        limite = time.monotonic() + espera_max
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                falta = (1 - self._tokens) / self.tasa
+            if ahora + falta > limite:
+                return False
+            time.sleep(falta)
+
+
+class _Vuelo:
+    # Respuesta en curso: un hilo la llena y cualquier número de lectores la consume
+    def __init__(self):
+        self.partes = []
+        self.terminado = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def agregar(self, parte):
+        with self._cond:
+            self.partes.append(parte)
+            self._cond.notify_all()
+
+    def cerrar(self, error=None):
+        with self._cond:
+            self.terminado = True
+            self.error = error
+            self._cond.notify_all()
+
+    def leer(self, espera_max):
+        i = 0
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(lambda: i < len(self.partes) or self.terminado, espera_max):
+                    raise ErrorGemini(None, "Tiempo de espera agotado")
+                nuevas = self.partes[i:]
+                i += len(nuevas)
+                terminado, error = self.terminado and i == len(self.partes), self.error
+            yield from nuevas
+            if terminado:
+                if error is not None:
+                    raise error
+                return
+
+
+def _textos_sse(respuesta):
+    for linea in respuesta.iter_lines(decode_unicode=True):
+        if not linea or not linea.startswith("data:"):
+            continue
+        evento = json.loads(linea[5:])
+        for candidato in evento.get("candidates", [])[:1]:
+            for parte in candidato.get("content", {}).get("parts", []):
+                if parte.get("text"):
+                    yield parte["text"]
+
+
+class ClienteGemini:
+    def __init__(self, api_key, url_base=URL_BASE, modelos=MODELOS, timeout_conexion=3.05,
+                 timeout_lectura=10, limite=None, espera_limite=2.0, max_conexiones=32, espera_primer_byte=1.5):
+        self.url_base = url_base.rstrip("/")
+        self.modelos = tuple(modelos)
+        self.timeout = (timeout_conexion, timeout_lectura)
+        self.espera_primer_byte = espera_primer_byte
+        self.limite = limite
+        self.espera_limite = espera_limite
+
+        self._sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=len(self.modelos), pool_maxsize=max_conexiones)
+        self._sesion.mount("https://", adaptador)
+        self._sesion.mount("http://", adaptador)
+        self._sesion.headers.update({"Content-Type": "application/json", "x-goog-api-key": api_key})
+
+        self._hilos = ThreadPoolExecutor(max_workers=max_conexiones, thread_name_prefix="gemini")
+        self._vuelos = {}
+        self._lock = threading.Lock()
+        self.solicitudes = 0
+        self.coalescidas = 0
+        self.respaldos = 0
+
+    def stream(self, prompt, espera_max=30.0):
+        with self._lock:
+            vuelo = self._vuelos.get(prompt)
+            if vuelo is None:
+                vuelo = self._vuelos[prompt] = _Vuelo()
+                self.solicitudes += 1
+                self._hilos.submit(self._atender, prompt, vuelo)
+            else:
+                self.coalescidas += 1
+        return vuelo.leer(espera_max)
+
+    def generar(self, prompt, espera_max=30.0):
+        return "".join(self.stream(prompt, espera_max))
+
+    def _atender(self, prompt, vuelo):
+        try:
+            if self.limite is not None and not self.limite.tomar(self.espera_limite):
+                raise ErrorGemini(429, "Límite de solicitudes del simulador alcanzado, intenta en unos segundos.")
+            for parte in self._stream_upstream(prompt):
+                vuelo.agregar(parte)
+            vuelo.cerrar()
+        except Exception as e:
+            vuelo.cerrar(e)
+        finally:
+            with self._lock:
+                self._vuelos.pop(prompt, None)
+
+    def _intento(self, modelo, cuerpo, eventos, cancelado):
+        # Corre en su propio hilo y deja en `eventos` ("texto"|"fin"|"error", modelo, dato)
+        url = f"{self.url_base}/models/{modelo}:streamGenerateContent"
+        try:
+            try:
+                respuesta = self._sesion.post(url, params={"alt": "sse"}, json=cuerpo, stream=True, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                raise ErrorGemini(None, f"conexión con {modelo}: {e}") from e
+            with respuesta:
+                if respuesta.status_code != 200:
+                    raise ErrorGemini(respuesta.status_code, respuesta.text)
+                try:
+                    for parte in _textos_sse(respuesta):
+                        if cancelado.is_set():
+                            return
+                        eventos.put(("texto", modelo, parte))
+                except requests.RequestException as e:
+                    raise ErrorGemini(None, f"respuesta de {modelo} interrumpida: {e}") from e
+            eventos.put(("fin", modelo, None))
+        except Exception as e:
+            eventos.put(("error", modelo, e))
+
+    def _stream_upstream(self, prompt):
+        cuerpo = {"contents": [{"parts": [{"text": prompt}]}]}
+        eventos = queue.Queue()
+        cancelado = threading.Event()
+        pendientes = list(self.modelos)
+        en_curso = set()
+        ganador = None
+        ultimo_error = None
+
+        def lanzar():
+            modelo = pendientes.pop(0)
+            en_curso.add(modelo)
+            threading.Thread(target=self._intento, args=(modelo, cuerpo, eventos, cancelado),
+                             name=f"gemini-{modelo}", daemon=True).start()
+            return time.monotonic() + self.espera_primer_byte
+
+        plazo = lanzar()
+        try:
+            while True:
+                # Sin primer trozo a tiempo se lanza el respaldo en paralelo (si hay cupo)
+                espera = max(0.0, plazo - time.monotonic()) if ganador is None and pendientes else None
+                try:
+                    tipo, modelo, dato = eventos.get(timeout=espera)
+                except queue.Empty:
+                    if self.limite is None or self.limite.tomar():
+                        plazo = lanzar()
+                    else:
+                        plazo = time.monotonic() + self.espera_primer_byte
+                    continue
+                if ganador is not None and modelo != ganador:
+                    continue  # el que perdió la carrera
+                if tipo == "texto":
+                    if ganador is None:
+                        ganador = modelo
+                        if modelo != self.modelos[0]:
+                            self.respaldos += 1
+                    yield dato
+                elif tipo == "fin":
+                    return
+                else:
+                    en_curso.discard(modelo)
+                    ultimo_error = dato
+                    reintentable = isinstance(dato, ErrorGemini) and (dato.status is None or dato.status in REINTENTABLES)
+                    if ganador is not None or not reintentable:
+                        raise dato
+                    if pendientes:
+                        plazo = lanzar()
+                    elif not en_curso:
+                        raise ultimo_error
+        finally:
+            cancelado.set()
+
+    def estadisticas(self):
+        return {"solicitudes": self.solicitudes, "coalescidas": self.coalescidas, "respaldos": self.respaldos}
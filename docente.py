@@ -0,0 +1,63 @@
+# =============================================================================
+# VISTA DOCENTE (?vista=docente)
+# =============================================================================
+# Muestra los agregados del registro de intentos (ver registro.py). Todas las
+# consultas van a tablas ya resumidas, así que carga al instante aunque haya
+# millones de intentos.
+#
+# Solo entra quien conoce KINE_DOCENTE_CLAVE (Secrets o variable de entorno);
+# sin clave configurada la vista queda deshabilitada.
+import hmac
+
+import streamlit as st
+
+
+def acceso_docente(clave):
+    # True si la sesión ya se identificó como docente; si no, pide la clave
+    if not clave:
+        st.error("La vista docente está deshabilitada: falta KINE_DOCENTE_CLAVE en los Secrets.")
+        return False
+    if st.session_state.get("docente_ok"):
+        return True
+    st.title("📊 Vista Docente")
+    ingresada = st.text_input("Clave docente:", type="password")
+    if not ingresada:
+        return False
+    if not hmac.compare_digest(ingresada.encode(), str(clave).encode()):
+        st.error("Clave incorrecta.")
+        return False
+    st.session_state.docente_ok = True
+    st.rerun()
+
+
+def mostrar_vista_docente(registro, sesiones=None):
+    st.title("📊 Vista Docente")
+    st.caption(f"Intentos escritos en esta sesión del servidor: {registro.escritos} · descartados: {registro.descartados}")
+
+    if sesiones is not None:
+        activas = sesiones.activas_por_caso()
+        st.metric("🧑‍🎓 Alumnos conectados ahora", sum(activas.values()))
+        if activas:
+            with st.expander("Alumnos por caso"):
+                st.dataframe([{"caso": caso, "alumnos": n} for caso, n in activas.most_common()], use_container_width=True)
+
+    resumen = registro.resumen()
+    if not resumen:
+        st.info("Aún no hay intentos registrados.")
+        return
+
+    casos = sorted({fila["caso"] for fila in resumen})
+    caso = st.selectbox("Filtrar por caso:", ["Todos"] + casos)
+    caso = None if caso == "Todos" else caso
+
+    st.subheader("Tasa de error por caso y equipo")
+    st.dataframe([f for f in resumen if caso is None or f["caso"] == caso], use_container_width=True)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.subheader("Parámetros que más fallan")
+        st.dataframe(registro.fallos_frecuentes(caso), use_container_width=True)
+    with c2:
+        st.subheader("Valores incorrectos más comunes")
+        campo = st.selectbox("Parámetro:", ["Todos", "ratio", "vector", "ciclo", "frecuencia", "metodo", "polaridad"])
+        st.dataframe(registro.valores_incorrectos(None if campo == "Todos" else campo, caso), use_container_width=True)
@@ -0,0 +1,167 @@
+# =============================================================================
+# MODELO DE DOSIS: CANTIDADES FÍSICAS DERIVADAS POR EQUIPO
+# =============================================================================
+# Cada función recibe un diccionario de params cuyos valores pueden ser
+# escalares (validación interactiva) o arreglos NumPy (barridos y
+# calificación masiva) y devuelve la cantidad derivada con el mismo formato.
+# Las reglas de DB_CASOS pueden referirse a estas cantidades con llaves
+# "<nombre>_min" / "<nombre>_max" (ver validacion.compilar_reglas).
+from functools import lru_cache
+
+import numpy as np
+
+# Fracción de tiempo emitiendo según el duty cycle del ultrasonido
+CICLOS_US = {"100% (Continuo)": 1.0, "50% (1:1)": 0.5, "20% (1:4)": 0.2, "10%": 0.1}
+# Área tratada como múltiplo del ERA del cabezal
+FACTORES_ERA = {"1x ERA": 1.0, "2x ERA": 2.0, "3x ERA": 3.0}
+# Ratio ON:OFF de la corriente Rusa -> fracción ON
+RATIOS_RUSA = {"1:1": 1 / 2, "1:2": 1 / 3, "1:4": 1 / 5, "1:5": 1 / 6}
+# Distancia a la que la lámpara entrega su irradiancia nominal (cm)
+DISTANCIA_REF_IR = 50.0
+# Distancias menores (incluido el 0 por defecto del formulario) se tratan como
+# lámpara a 1 cm: la irradiancia queda muy alta y una regla "_max" no la deja pasar
+DISTANCIA_MIN_IR = 1.0
+
+
+def _es_escalar(x):
+    return np.ndim(x) == 0
+
+
+def _redondear(x, decimales=1):
+    # En escalares usa round() de Python, igual que el cálculo original en pantalla
+    return round(float(x), decimales) if _es_escalar(x) else np.round(x, decimales)
+
+
+def _mapear(valores, tabla):
+    # Etiqueta -> número, para un valor suelto o un arreglo de etiquetas
+    if _es_escalar(valores):
+        return tabla.get(valores, np.nan)
+    unicos, inverso = np.unique(valores, return_inverse=True)
+    return np.array([tabla.get(v, np.nan) for v in unicos])[inverso].reshape(np.shape(valores))
+
+
+def _donde(condicion, si, no):
+    # np.where que conserva el tipo de Python cuando todo es escalar
+    if _es_escalar(condicion) and _es_escalar(si) and _es_escalar(no):
+        return si if condicion else no
+    return np.where(condicion, si, no)
+
+
+def _dividir(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(np.asarray(b) > 0, np.divide(a, np.where(np.asarray(b) > 0, b, 1)), 0.0)
+    return r.item() if r.ndim == 0 else r
+
+
+# === ONDA CORTA ===
+def potencia_media(p):
+    # Fórmula: Pico * (Ancho * 10^-6) * Frecuencia (en continuo es la potencia pico)
+    potencia = p.get("potencia", 0)
+    pulsada = _redondear(potencia * (p.get("fase", 0) * 0.000001) * p.get("frec_pulso", 0))
+    modo = p.get("modo")
+    continuo = modo == "Continuo (CSWD)" if _es_escalar(modo) else np.equal(modo, "Continuo (CSWD)")
+    return _donde(continuo, potencia, pulsada)
+
+
+def energia_onda_corta(p):
+    # Julios entregados en la sesión
+    return potencia_media(p) * p.get("tiempo", 0) * 60
+
+
+# === ULTRASONIDO ===
+def intensidad_media_us(p):
+    # W/cm² promediados en el tiempo según el duty cycle
+    return p.get("intensidad", 0) * _mapear(p.get("ciclo"), CICLOS_US)
+
+
+def densidad_energia_us(p):
+    # J/cm² sobre el área tratada: se reparte entre tantos ERA como indique la relación
+    return _dividir(intensidad_media_us(p) * p.get("tiempo", 0) * 60, _mapear(p.get("era"), FACTORES_ERA))
+
+
+# === TENS ===
+def carga_fase_tens(p):
+    # µC por fase: mA * µs = nC
+    return p.get("intensidad", 0) * p.get("duracion", 0) / 1000
+
+
+# === RUSA ===
+def ciclo_trabajo_rusa(p):
+    # Fracción ON del ciclo: desde los tiempos ON/OFF si están, si no desde el ratio
+    on, off = p.get("on", 0), p.get("off", 0)
+    por_tiempos = _dividir(on, on + off)
+    por_ratio = _mapear(p.get("ratio"), RATIOS_RUSA)
+    return _donde(np.asarray(on + off) > 0, por_tiempos, por_ratio)
+
+
+def ciclo_efectivo_rusa(p):
+    # Las ráfagas de la portadora duran la mitad de cada periodo de burst
+    return ciclo_trabajo_rusa(p) * 0.5
+
+
+# === FARÁDICA ===
+def ciclo_trabajo_faradica(p):
+    return _dividir(p.get("fase", 0), p.get("fase", 0) + p.get("pausa", 0))
+
+
+# === INFRARROJO ===
+def irradiancia_relativa_ir(p):
+    # Ley del inverso del cuadrado, 1.0 a la distancia de referencia
+    distancia = np.maximum(p.get("distancia", 0), DISTANCIA_MIN_IR)
+    return _dividir(DISTANCIA_REF_IR ** 2, distancia ** 2)
+
+
+def dosis_relativa_ir(p):
+    return irradiancia_relativa_ir(p) * p.get("tiempo", 0)
+
+
+# (función, etiqueta, unidad) por cantidad derivada
+DOSIS = {
+    "Onda Corta": {
+        "media_resultante": (potencia_media, "Potencia media", "W"),
+        "energia": (energia_onda_corta, "Energía", "J"),
+    },
+    "Ultrasonido": {
+        "intensidad_media": (intensidad_media_us, "Intensidad media", "W/cm²"),
+        "densidad_energia": (densidad_energia_us, "Densidad de energía", "J/cm²"),
+    },
+    "TENS": {
+        "carga_fase": (carga_fase_tens, "Carga por fase", "µC"),
+    },
+    "Rusa": {
+        "ciclo_trabajo": (ciclo_trabajo_rusa, "Ciclo de trabajo", ""),
+        "ciclo_efectivo": (ciclo_efectivo_rusa, "Ciclo efectivo", ""),
+    },
+    "Farádica": {
+        "ciclo_trabajo": (ciclo_trabajo_faradica, "Ciclo de trabajo", ""),
+    },
+    "Infrarrojo": {
+        "irradiancia_relativa": (irradiancia_relativa_ir, "Irradiancia relativa", "×"),
+        "dosis_relativa": (dosis_relativa_ir, "Dosis relativa", "×min"),
+    },
+}
+
+
+def funciones(familia):
+    # {campo: función} listo para barrido.barrer
+    return {campo: fn for campo, (fn, _, _) in DOSIS.get(familia, {}).items()}
+
+
+def _clave(params):
+    return tuple(sorted((k, v) for k, v in params.items() if isinstance(v, (int, float, str))))
+
+
+@lru_cache(maxsize=4096)
+def _calcular(familia, clave):
+    p = dict(clave)
+    return {campo: fn(p) for campo, (fn, _, _) in DOSIS.get(familia, {}).items()}
+
+
+def calcular(familia, params):
+    # Cantidades derivadas de una configuración, en cache por tupla de params
+    return _calcular(familia, _clave(params))
+
+
+def calcular_vector(familia, columnas):
+    # Mismo cálculo sobre columnas NumPy (una fila por entrega o punto de grilla)
+    return {campo: fn(columnas) for campo, (fn, _, _) in DOSIS.get(familia, {}).items()}
@@ -0,0 +1,167 @@
+# =============================================================================
+# FORMULARIOS DE PARÁMETROS POR EQUIPO
+# =============================================================================
+# Cada equipo tiene su función que dibuja los widgets y llena `params`.
+# Los formularios van dentro de st.form: editar un valor no re-ejecuta el
+# script, todo se envía junto con "Validar Tratamiento". Los equipos con
+# cálculos en vivo (Onda Corta) usan st.fragment, que re-ejecuta solo su
+# propio bloque al cambiar un valor.
+import streamlit as st
+
+from dosis import potencia_media
+
+
+# === TENS (Parámetros Completos) ===
+def _tens(params):
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        params["onda"] = st.selectbox("Tipo de Onda", ["Bifásica Simétrica", "Bifásica Asimétrica"])
+        params["freq"] = st.number_input("Frecuencia (Hz)", 0, 250, value=0)
+    with c2:
+        params["duracion"] = st.number_input("Duración de Fase (µs)", 0, 500, value=0)
+        params["tiempo"] = st.number_input("Tiempo Total (min)", 0, 60, value=0)
+    with c3:
+        params["intensidad"] = st.number_input("Intensidad (mA)", 0, 100, value=0)
+        params["modo"] = st.radio("Modo", ["CC (Corriente Constante)", "CV (Voltaje Constante)"])
+
+    with st.expander("🎛️ Modulaciones y Burst (Avanzado)", expanded=True):
+        mc1, mc2, mc3 = st.columns(3)
+        with mc1: params["mod_freq"] = st.number_input("Mod. Frecuencia (Hz)", 0, 100, value=0)
+        with mc2: params["mod_amp"] = st.number_input("Mod. Amplitud (%)", 0, 100, value=0)
+        with mc3: params["burst"] = st.number_input("Burst / Recorrido", 0, 10, value=0)
+
+
+# === RUSA (Parámetros Completos) ===
+def _rusa(params):
+    c1, c2 = st.columns(2)
+    with c1:
+        params["onda"] = st.selectbox("Onda", ["Rusa (Sinusoidal)", "Cuadrada"])
+        params["portadora"] = st.number_input("Portadora (Hz)", value=2500, step=500)
+        params["burst"] = st.number_input("Frec. Burst (Hz)", 0, 100, value=0)
+    with c2:
+        params["ratio"] = st.selectbox("Ratio (Ciclo Trabajo)", ["1:1", "1:2", "1:4", "1:5"])
+        params["intensidad"] = st.number_input("Intensidad (mA)", 0, 120, value=0)
+        params["tiempo"] = st.number_input("Tiempo (min)", 0, 60, value=0)
+
+    with st.expander("⏱️ Tiempos de Ciclo (ON/OFF/Rampa)", expanded=True):
+        t1, t2, t3 = st.columns(3)
+        with t1: params["rampa"] = st.number_input("Rampa (s)", 0, 10, value=0)
+        with t2: params["on"] = st.number_input("Tiempo ON (s)", 0, 60, value=0)
+        with t3: params["off"] = st.number_input("Tiempo OFF (s)", 0, 60, value=0)
+
+
+# === TIF (Parámetros Completos) ===
+def _tif(params):
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        params["portadora"] = st.number_input("Portadora (Hz)", 0, 10000, value=0)
+        params["amf"] = st.number_input("AMF (Hz)", 0, 250, value=0)
+    with c2:
+        params["espectro"] = st.number_input("Espectro de Frec.", 0, 200, value=0)
+        params["vector"] = st.selectbox("Vector", ["Manual/Off", "6:6", "1:30:1:30"])
+    with c3:
+        params["intensidad"] = st.number_input("Intensidad (mA)", 0, 100, value=0)
+        params["tiempo"] = st.number_input("Tiempo (min)", 0, 60, value=0)
+
+
+# === FARÁDICA (Parámetros Completos) ===
+def _faradica(params):
+    c1, c2 = st.columns(2)
+    with c1:
+        params["polaridad"] = st.selectbox("Polaridad", ["Normal", "Inversión"])
+        params["intensidad"] = st.number_input("Intensidad (mA)", 0, 80, value=0)
+    with c2:
+        params["tiempo"] = st.number_input("Tiempo Sesión (min)", 0, 60, value=0)
+        params["modo"] = st.radio("Modo", ["CC", "CV"])
+
+    with st.expander("⚡ Configuración de Pulsos (ms)", expanded=True):
+        p1, p2 = st.columns(2)
+        with p1: params["fase"] = st.number_input("Tiempo Fase (ms)", 0.0, 5000.0, value=0.0, step=10.0)
+        with p2: params["pausa"] = st.number_input("Tiempo Pausa (ms)", 0.0, 5000.0, value=0.0, step=10.0)
+
+
+# === ULTRASONIDO (Parámetros Completos) ===
+def _ultrasonido(params):
+    c1, c2 = st.columns(2)
+    with c1:
+        params["frecuencia"] = st.radio("Frecuencia", ["1 MHz", "3 MHz"])
+        params["ciclo"] = st.selectbox("Duty Cycle", ["100% (Continuo)", "50% (1:1)", "20% (1:4)", "10%"])
+    with c2:
+        params["intensidad"] = st.number_input("Intensidad (W/cm²)", 0.0, 3.0, step=0.1)
+        params["tiempo"] = st.number_input("Tiempo (min)", 0, 30, value=0)
+        params["era"] = st.selectbox("Relación ERA", ["1x ERA", "2x ERA", "3x ERA"])
+
+
+# === ONDA CORTA (Parámetros Completos con Cálculo Auto) ===
+def _onda_corta(params):
+    c1, c2 = st.columns(2)
+    with c1:
+        params["metodo"] = st.selectbox("Método", ["Capacitivo (Campo Eléctrico)", "Inductivo (Campo Magnético)"])
+        params["tecnica"] = st.selectbox("Técnica", ["Coplanar", "Contraplanar", "Longitudinal", "Monodo"])
+        params["modo"] = st.radio("Modo Emisión", ["Pulsado (PSWD)", "Continuo (CSWD)"])
+    with c2:
+        params["fase"] = st.number_input("Ancho Pulso (µs)", 0, 400, value=0) # Fase
+        params["frec_pulso"] = st.number_input("Frecuencia (Hz)", 0, 1000, value=0)
+        params["potencia"] = st.number_input("Potencia Pico (W)", 0, 1000, value=0)
+        params["tiempo"] = st.number_input("Tiempo (min)", 0, 30, value=0)
+
+    # Cálculo en vivo de la Potencia Media
+    potencia_media_resultante = potencia_media(params)
+    st.metric(label="🔥 Potencia Media Resultante (Automático)", value=f"{potencia_media_resultante} W")
+    params["media_resultante"] = potencia_media_resultante
+
+
+# === INFRARROJO ===
+def _infrarrojo(params):
+    c1, c2 = st.columns(2)
+    with c1:
+        params["tipo"] = st.radio("Tipo Lámpara", ["Luminoso", "No Luminoso"])
+    with c2:
+        params["distancia"] = st.number_input("Distancia (cm)", 0, 100, value=0)
+        params["tiempo"] = st.number_input("Tiempo (min)", 0, 60, value=0)
+
+
+FORMULARIOS = {
+    "TENS": _tens,
+    "Rusa": _rusa,
+    "TIF": _tif,
+    "Farádica": _faradica,
+    "Ultrasonido": _ultrasonido,
+    "Onda Corta": _onda_corta,
+    "Infrarrojo": _infrarrojo,
+}
+
+# Equipos con valores calculados que deben actualizarse mientras se edita
+EN_VIVO = {"Onda Corta"}
+
+
+@st.fragment
+def _parametros_en_vivo(renderizar, params):
+    # Al cambiar un valor solo se re-ejecuta este fragmento; en la ejecución
+    # completa (al validar) llena `params` como cualquier otro formulario.
+    renderizar(params)
+
+
+def _justificacion():
+    st.markdown("---")
+    return st.text_area("✍️ Justificación Clínica", placeholder="Explica aquí por qué elegiste estos parámetros...")
+
+
+def formulario_equipo(equipo):
+    # Devuelve (params, justificacion, validar_btn) para el equipo elegido
+    params = {} # Diccionario para guardar lo que elija el usuario
+    renderizar = FORMULARIOS[equipo]
+
+    if equipo in EN_VIVO:
+        with st.container():
+            _parametros_en_vivo(renderizar, params)
+        justificacion = _justificacion()
+        validar_btn = st.button("✅ Validar Tratamiento", type="primary", use_container_width=True)
+        return params, justificacion, validar_btn
+
+    with st.form(f"form_{equipo}", border=False):
+        with st.container():
+            renderizar(params)
+        justificacion = _justificacion()
+        validar_btn = st.form_submit_button("✅ Validar Tratamiento", type="primary", use_container_width=True)
+    return params, justificacion, validar_btn
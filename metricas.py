@@ -0,0 +1,180 @@
+# =============================================================================
+# MÉTRICAS DE EJECUCIÓN (TIEMPOS POR FASE, CONTADORES Y ENDPOINT PROMETHEUS)
+# =============================================================================
+# Complementa arranque.py (que mide una sola vez por proceso) con tiempos de
+# cada re-ejecución de app.py, acumulados entre todas las sesiones del
+# proceso. Por fase se guardan el total, la suma y las últimas N duraciones
+# (para p50/p95/p99). Registrar una duración es un append bajo un lock; los
+# percentiles se calculan recién al consultarlos.
+#
+# Con KINE_METRICAS_PUERTO definido, la app sirve /metrics en formato de texto
+# de Prometheus en ese puerto (solo en 127.0.0.1 por defecto). Si el puerto no
+# se puede abrir, se avisa una vez en el log y la app sigue sin /metrics.
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CUANTILES = (0.5, 0.95, 0.99)
+_log = logging.getLogger(__name__)
+
+
+class _Serie:
+    def __init__(self, ventana):
+        self.recientes = deque(maxlen=ventana)
+        self.total = 0
+        self.suma = 0.0
+
+    def agregar(self, segundos):
+        self.recientes.append(segundos)
+        self.total += 1
+        self.suma += segundos
+
+    def cuantiles(self):
+        ordenadas = sorted(self.recientes)
+        if not ordenadas:
+            return {q: 0.0 for q in CUANTILES}
+        return {q: ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] for q in CUANTILES}
+
+
+class Metricas:
+    def __init__(self, ventana=2048):
+        self.ventana = ventana
+        self._lock = threading.Lock()
+        self._series = {}
+        self._contadores = {}
+        self._medidores = {}
+
+    # -- Registro (camino caliente) --
+    def registrar(self, fase, segundos):
+        with self._lock:
+            serie = self._series.get(fase)
+            if serie is None:
+                serie = self._series[fase] = _Serie(self.ventana)
+            serie.agregar(segundos)
+
+    @contextmanager
+    def medir(self, fase):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(fase, time.perf_counter() - t0)
+
+    def contar(self, evento, n=1):
+        with self._lock:
+            self._contadores[evento] = self._contadores.get(evento, 0) + n
+
+    def medidor(self, nombre, funcion):
+        # `funcion` devuelve un dict de valores numéricos; se lee al consultar
+        self._medidores[nombre] = funcion
+
+    # -- Consulta --
+    def resumen(self):
+        with self._lock:
+            series = {fase: (s.total, s.suma, s.cuantiles()) for fase, s in self._series.items()}
+            contadores = dict(self._contadores)
+        fases = {
+            fase: {"n": total, "media_ms": round(1000 * suma / total, 3),
+                   **{f"p{int(q * 100)}_ms": round(1000 * v, 3) for q, v in cuantiles.items()}}
+            for fase, (total, suma, cuantiles) in series.items()
+        }
+        return {"fases": fases, "contadores": contadores, "medidores": self._leer_medidores()}
+
+    def _leer_medidores(self):
+        valores = {}
+        for nombre, funcion in list(self._medidores.items()):
+            try:
+                valores[nombre] = dict(funcion())
+            except Exception:
+                continue  # un medidor roto no debe tumbar el resto
+        return valores
+
+    def prometheus(self):
+        with self._lock:
+            series = {fase: (s.total, s.suma, s.cuantiles()) for fase, s in self._series.items()}
+            contadores = dict(self._contadores)
+        lineas = [
+            "# HELP kine_fase_segundos Duración de cada fase de una ejecución de app.py.",
+            "# TYPE kine_fase_segundos summary",
+        ]
+        for fase, (total, suma, cuantiles) in sorted(series.items()):
+            for q, v in cuantiles.items():
+                lineas.append(f'kine_fase_segundos{{fase="{fase}",quantile="{q}"}} {v:.6f}')
+            lineas.append(f'kine_fase_segundos_sum{{fase="{fase}"}} {suma:.6f}')
+            lineas.append(f'kine_fase_segundos_count{{fase="{fase}"}} {total}')
+        lineas += ["# HELP kine_eventos_total Eventos contados por la app.", "# TYPE kine_eventos_total counter"]
+        for evento, n in sorted(contadores.items()):
+            lineas.append(f'kine_eventos_total{{evento="{evento}"}} {n}')
+        lineas += ["# HELP kine_estado Valores de estado de los componentes compartidos.", "# TYPE kine_estado gauge"]
+        for nombre, valores in sorted(self._leer_medidores().items()):
+            for clave, valor in sorted(valores.items()):
+                if isinstance(valor, (int, float)):
+                    lineas.append(f'kine_estado{{componente="{nombre}",valor="{clave}"}} {valor}')
+        return "\n".join(lineas) + "\n"
+
+
+class Cronometro:
+    # Mide fases consecutivas de un script sin anidar bloques: cada vuelta
+    # registra el tiempo desde la vuelta anterior
+    def __init__(self, metricas):
+        self._metricas = metricas
+        self._inicio = self._ultima = time.perf_counter()
+
+    def vuelta(self, fase):
+        ahora = time.perf_counter()
+        self._metricas.registrar(fase, ahora - self._ultima)
+        self._ultima = ahora
+
+    def total(self, fase):
+        self._metricas.registrar(fase, time.perf_counter() - self._inicio)
+
+
+# =============================================================================
+# ENDPOINT /metrics
+# =============================================================================
+class _Manejador(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        datos = self.server.metricas.prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+
+def servir(metricas, puerto, host="127.0.0.1"):
+    servidor = ThreadingHTTPServer((host, puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.metricas = metricas
+    threading.Thread(target=servidor.serve_forever, name="metricas", daemon=True).start()
+    return servidor
+
+
+# Instancia del proceso, compartida por todas las sesiones
+METRICAS = Metricas()
+_servidor = None
+_intentado = False
+_lock_servidor = threading.Lock()
+
+
+def iniciar_servidor(puerto, host="127.0.0.1"):
+    # Idempotente: el primer llamado abre el puerto, los siguientes no hacen nada.
+    # Devuelve None si no se pudo abrir (ej. puerto en uso); no se reintenta.
+    global _servidor, _intentado
+    with _lock_servidor:
+        if not _intentado:
+            _intentado = True
+            try:
+                _servidor = servir(METRICAS, puerto, host)
+            except OSError:
+                _log.exception("No se pudo abrir /metrics en %s:%s; la app sigue sin métricas HTTP", host, puerto)
+    return _servidor
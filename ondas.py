@@ -0,0 +1,169 @@
+# =============================================================================
+# SÍNTESIS DE FORMAS DE ONDA (TENS, RUSA, TIF Y FARÁDICA)
+# =============================================================================
+# Genera la corriente que entregaría el equipo con los params del formulario,
+# vectorizada con NumPy y memorizada por tupla de parámetros. Para graficar,
+# decimar() reduce la señal a pares mínimo/máximo por tramo: una señal de
+# 4 kHz de varios segundos queda en unos pocos miles de puntos sin perder la
+# envolvente. tabla_para_grafico() entrega esa señal ya armada como DataFrame.
+from functools import lru_cache
+
+import numpy as np
+
+MAX_MUESTRAS = 200_000
+
+
+def _tiempo(segundos, f_max):
+    # Siempre 8 muestras por ciclo de la componente más rápida; si la ventana
+    # pedida supera MAX_MUESTRAS se acorta la ventana, nunca la resolución
+    # (bajar la frecuencia de muestreo haría aliasing de la portadora)
+    fs = 8 * max(f_max, 1.0)
+    segundos = min(segundos, MAX_MUESTRAS / fs)
+    return np.arange(max(int(segundos * fs), 1)) / fs
+
+
+def _pulsos(t, periodo, ancho):
+    # Fase dentro de cada periodo y máscara de "pulso activo"
+    fase = np.mod(t, periodo)
+    return fase, fase < ancho
+
+
+# === TENS: pulsos bifásicos con modulación de amplitud y burst opcional ===
+def _tens(p):
+    freq = p.get("freq", 0)
+    duracion = p.get("duracion", 0) * 1e-6
+    if freq <= 0 or duracion <= 0:
+        return _tiempo(1.0, 1.0), None
+    t = _tiempo(max(3.0 / freq, 0.5), 1.0 / duracion / 2)
+    fase, positiva = _pulsos(t, 1.0 / freq, duracion)
+    if p.get("onda") == "Bifásica Asimétrica":
+        # Fase negativa más larga y de menor amplitud (carga balanceada)
+        negativa = (fase >= duracion) & (fase < 5 * duracion)
+        y = positiva * 1.0 - negativa * 0.25
+    else:
+        negativa = (fase >= duracion) & (fase < 2 * duracion)
+        y = positiva * 1.0 - negativa * 1.0
+    if p.get("mod_freq", 0) > 0 and p.get("mod_amp", 0) > 0:
+        y = y * (1 - p["mod_amp"] / 100 * (0.5 - 0.5 * np.cos(2 * np.pi * p["mod_freq"] * t)))
+    if p.get("burst", 0) > 0:
+        y = y * (np.mod(t, 1.0 / p["burst"]) < 0.5 / p["burst"])
+    return t, y * p.get("intensidad", 0)
+
+
+# === RUSA: portadora de 2500 Hz en ráfagas, con ciclo ON/OFF y rampas ===
+def _rusa(p):
+    portadora = p.get("portadora", 2500)
+    on, off, rampa = p.get("on", 0), p.get("off", 0), p.get("rampa", 0)
+    ciclo = on + off
+    # Con ciclos largos la ventana queda en el inicio del ON (rampa y primeras ráfagas)
+    t = _tiempo(ciclo if ciclo > 0 else 0.2, portadora)
+    if p.get("onda") == "Cuadrada":
+        y = np.sign(np.sin(2 * np.pi * portadora * t))
+    else:
+        y = np.sin(2 * np.pi * portadora * t)
+    if p.get("burst", 0) > 0:
+        y = y * (np.mod(t, 1.0 / p["burst"]) < 0.5 / p["burst"])
+    if ciclo > 0:
+        # Envolvente trapezoidal: sube en `rampa`, se mantiene y baja al final del ON
+        dentro = np.mod(t, ciclo)
+        subida = np.clip(dentro / rampa, 0, 1) if rampa > 0 else np.ones_like(t)
+        bajada = np.clip((on - dentro) / rampa, 0, 1) if rampa > 0 else np.ones_like(t)
+        y = y * np.minimum(subida, bajada) * (dentro < on)
+    return t, y * p.get("intensidad", 0)
+
+
+# === TIF: dos portadoras que se interfieren y laten a la AMF ===
+def _tif(p):
+    portadora = p.get("portadora", 0)
+    amf = p.get("amf", 0)
+    t = _tiempo(max(3.0 / amf, 0.05) if amf > 0 else 0.05, portadora + amf)
+    y = 0.5 * (np.sin(2 * np.pi * portadora * t) + np.sin(2 * np.pi * (portadora + amf) * t))
+    return t, y * p.get("intensidad", 0)
+
+
+# === FARÁDICA: pulsos rectangulares o triangulares separados por pausas ===
+def _faradica(p, subtipo):
+    fase = p.get("fase", 0) / 1000
+    pausa = p.get("pausa", 0) / 1000
+    if fase <= 0:
+        return _tiempo(1.0, 1.0), None
+    periodo = fase + pausa
+    t = _tiempo(3 * periodo, 25.0 / fase)
+    dentro, activo = _pulsos(t, periodo, fase)
+    if subtipo == "Triangular":
+        y = activo * (dentro / fase)
+    else:
+        y = activo * 1.0
+    if p.get("polaridad") == "Inversión":
+        y = -y
+    return t, y * p.get("intensidad", 0)
+
+
+SINTETIZADORES = {
+    "TENS": _tens,
+    "Rusa": _rusa,
+    "TIF": _tif,
+    "Farádica": _faradica,
+}
+
+
+def _clave(params):
+    return tuple(sorted((k, v) for k, v in params.items() if isinstance(v, (int, float, str))))
+
+
+@lru_cache(maxsize=16)  # a resolución completa pesa hasta ~3 MB por señal
+def _sintetizar(equipo, clave):
+    familia, _, subtipo = equipo.partition(" (")
+    p = dict(clave)
+    if familia == "Farádica":
+        t, y = _faradica(p, subtipo.rstrip(")"))
+    else:
+        t, y = SINTETIZADORES[familia](p)
+    if y is None:
+        y = np.zeros_like(t)
+    y = np.asarray(y, dtype=float)
+    t.setflags(write=False)
+    y.setflags(write=False)
+    return t, y
+
+
+def sintetizar(equipo, params):
+    # (t, y) a resolución completa; equipo es el nombre completo, ej "Farádica (Triangular)"
+    return _sintetizar(equipo, _clave(params))
+
+
+def decimar(t, y, puntos=2000):
+    # Min/max por tramo: conserva picos y envolvente con `puntos` valores
+    tramos = puntos // 2
+    if len(y) <= puntos:
+        return t, y
+    tam = len(y) // tramos
+    bloques = y[: tramos * tam].reshape(tramos, tam)
+    t_inicio = t[: tramos * tam : tam]
+    y_d = np.empty(2 * tramos)
+    y_d[0::2] = bloques.min(axis=1)
+    y_d[1::2] = bloques.max(axis=1)
+    t_d = np.repeat(t_inicio, 2)
+    return t_d, y_d
+
+
+@lru_cache(maxsize=128)
+def _para_grafico(equipo, clave, puntos):
+    return decimar(*_sintetizar(equipo, clave), puntos)
+
+
+def onda_para_grafico(equipo, params, puntos=2000):
+    return _para_grafico(equipo, _clave(params), puntos)
+
+
+@lru_cache(maxsize=128)
+def _tabla(equipo, clave, puntos):
+    import pandas as pd  # solo la vista previa lo necesita
+
+    t, y = _para_grafico(equipo, clave, puntos)
+    return pd.DataFrame({"Tiempo (s)": t, "Corriente (mA)": y})
+
+
+def tabla_para_grafico(equipo, params, puntos=2000):
+    # DataFrame listo para st.line_chart; en cache para no rearmarlo en cada ejecución
+    return _tabla(equipo, _clave(params), puntos)
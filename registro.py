@@ -0,0 +1,202 @@
+# =============================================================================
+# REGISTRO DE INTENTOS Y AGREGADOS PARA EL DOCENTE
+# =============================================================================
+# Cada "Validar Tratamiento" se encola en memoria y un hilo de fondo lo escribe
+# a SQLite en lotes, así que registrar nunca agrega latencia al click. En la
+# misma transacción de cada lote se actualizan tablas de agregados (intentos y
+# errores por caso/equipo, fallos por parámetro, valores incorrectos más
+# comunes), que la vista docente lee directo sin recorrer los intentos.
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from validacion import motor
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS intentos (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    caso TEXT NOT NULL,
+    equipo TEXT NOT NULL,
+    es_correcto INTEGER NOT NULL,
+    fallos TEXT NOT NULL,
+    params TEXT NOT NULL,
+    justificacion TEXT,
+    feedback_tecnico TEXT,
+    feedback_ia TEXT
+);
+CREATE TABLE IF NOT EXISTS agg_caso_equipo (
+    caso TEXT NOT NULL,
+    equipo TEXT NOT NULL,
+    intentos INTEGER NOT NULL,
+    incorrectos INTEGER NOT NULL,
+    con_observaciones INTEGER NOT NULL,
+    PRIMARY KEY (caso, equipo)
+);
+CREATE TABLE IF NOT EXISTS agg_fallos (
+    caso TEXT NOT NULL,
+    equipo TEXT NOT NULL,
+    codigo TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (caso, equipo, codigo)
+);
+CREATE TABLE IF NOT EXISTS agg_valores (
+    caso TEXT NOT NULL,
+    equipo TEXT NOT NULL,
+    campo TEXT NOT NULL,
+    valor TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (caso, equipo, campo, valor)
+);
+"""
+
+_FIN = object()
+_log = logging.getLogger(__name__)
+
+
+def _conectar(ruta):
+    conexion = sqlite3.connect(ruta, timeout=30, check_same_thread=False)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute("PRAGMA synchronous=NORMAL")
+    return conexion
+
+
+class RegistroIntentos:
+    def __init__(self, ruta, tam_lote=200, intervalo=1.0, max_pendientes=100_000):
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self.ruta = ruta
+        self.tam_lote = tam_lote
+        self.intervalo = intervalo
+        self.descartados = 0
+        self.escritos = 0
+        self.lotes_fallidos = 0
+
+        with _conectar(ruta) as conexion:
+            conexion.executescript(ESQUEMA)
+        self._lectura = _conectar(ruta)
+        self._lock_lectura = threading.Lock()
+
+        self._cola = queue.Queue(maxsize=max_pendientes)
+        self._hilo = threading.Thread(target=self._escritor, name="registro-intentos", daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    # -- Lado del click: solo encola --
+    def registrar(self, caso, equipo, params, justificacion, resultado, feedback_ia=None):
+        intento = (time.time(), caso, equipo, resultado.es_correcto, resultado.fallos,
+                   dict(params), justificacion, resultado.texto, feedback_ia)
+        try:
+            self._cola.put_nowait(intento)
+        except queue.Full:
+            self.descartados += 1  # con la cola llena se prefiere perder un registro a frenar la app
+
+    # -- Hilo de fondo: escribe en lotes --
+    def _escritor(self):
+        conexion = _conectar(self.ruta)
+        terminar = False
+        while not terminar:
+            lote = []
+            try:
+                lote.append(self._cola.get(timeout=self.intervalo))
+                while len(lote) < self.tam_lote:
+                    lote.append(self._cola.get_nowait())
+            except queue.Empty:
+                pass
+            if lote and lote[-1] is _FIN:
+                lote.pop()
+                terminar = True
+            if lote:
+                try:
+                    self._escribir(conexion, lote)
+                except Exception:
+                    # Un lote que no se puede escribir se pierde, pero el hilo sigue vivo
+                    self.lotes_fallidos += 1
+                    _log.exception("No se pudo escribir un lote de %d intentos", len(lote))
+        conexion.close()
+
+    def _escribir(self, conexion, lote):
+        por_caso_equipo = Counter()
+        incorrectos = Counter()
+        con_observaciones = Counter()
+        fallos = Counter()
+        valores = Counter()
+        filas = []
+        for ts, caso, equipo, es_correcto, codigos, params, justificacion, texto, feedback_ia in lote:
+            filas.append((ts, caso, equipo, int(es_correcto), ",".join(codigos),
+                          json.dumps(params, ensure_ascii=False), justificacion, texto, feedback_ia))
+            par = (caso, equipo)
+            por_caso_equipo[par] += 1
+            incorrectos[par] += not es_correcto
+            con_observaciones[par] += bool(codigos)
+            campos = {r.codigo: r.campo for r in motor().restricciones(caso, equipo)}
+            for codigo in codigos:
+                fallos[par + (codigo,)] += 1
+                campo = campos.get(codigo)
+                if campo is not None and campo in params:
+                    valores[par + (campo, str(params[campo]))] += 1
+
+        with conexion:
+            conexion.executemany(
+                "INSERT INTO intentos (ts, caso, equipo, es_correcto, fallos, params, justificacion, feedback_tecnico, feedback_ia)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", filas)
+            conexion.executemany(
+                "INSERT INTO agg_caso_equipo VALUES (?, ?, ?, ?, ?) ON CONFLICT (caso, equipo) DO UPDATE SET"
+                " intentos = intentos + excluded.intentos, incorrectos = incorrectos + excluded.incorrectos,"
+                " con_observaciones = con_observaciones + excluded.con_observaciones",
+                [par + (n, incorrectos[par], con_observaciones[par]) for par, n in por_caso_equipo.items()])
+            conexion.executemany(
+                "INSERT INTO agg_fallos VALUES (?, ?, ?, ?) ON CONFLICT (caso, equipo, codigo) DO UPDATE SET n = n + excluded.n",
+                [clave + (n,) for clave, n in fallos.items()])
+            conexion.executemany(
+                "INSERT INTO agg_valores VALUES (?, ?, ?, ?, ?) ON CONFLICT (caso, equipo, campo, valor) DO UPDATE SET n = n + excluded.n",
+                [clave + (n,) for clave, n in valores.items()])
+        self.escritos += len(filas)
+
+    def cerrar(self):
+        # Escribe lo pendiente y detiene el hilo (se llama solo al salir del proceso)
+        if self._hilo.is_alive():
+            self._cola.put(_FIN)
+            self._hilo.join()
+
+    def estadisticas(self):
+        return {"escritos": self.escritos, "descartados": self.descartados,
+                "lotes_fallidos": self.lotes_fallidos, "pendientes": self._cola.qsize()}
+
+    # -- Consultas para la vista docente (solo tablas de agregados) --
+    def _consultar(self, sql, parametros=()):
+        with self._lock_lectura:
+            cursor = self._lectura.execute(sql, parametros)
+            columnas = [c[0] for c in cursor.description]
+            return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def resumen(self):
+        return self._consultar(
+            "SELECT caso, equipo, intentos, incorrectos, con_observaciones,"
+            " ROUND(1.0 * incorrectos / intentos, 3) AS tasa_error"
+            " FROM agg_caso_equipo ORDER BY tasa_error DESC, intentos DESC")
+
+    def fallos_frecuentes(self, caso=None, limite=20):
+        filtro, parametros = ("WHERE f.caso = ?", (caso,)) if caso else ("", ())
+        return self._consultar(
+            "SELECT f.caso, f.equipo, f.codigo, f.n, ROUND(1.0 * f.n / a.intentos, 3) AS tasa"
+            " FROM agg_fallos f JOIN agg_caso_equipo a USING (caso, equipo) "
+            + filtro + " ORDER BY f.n DESC LIMIT ?", parametros + (limite,))
+
+    def valores_incorrectos(self, campo=None, caso=None, limite=20):
+        condiciones, parametros = [], []
+        if campo:
+            condiciones.append("campo = ?")
+            parametros.append(campo)
+        if caso:
+            condiciones.append("caso = ?")
+            parametros.append(caso)
+        filtro = ("WHERE " + " AND ".join(condiciones)) if condiciones else ""
+        return self._consultar(
+            "SELECT caso, equipo, campo, valor, n FROM agg_valores " + filtro + " ORDER BY n DESC LIMIT ?",
+            tuple(parametros) + (limite,))
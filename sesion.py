@@ -0,0 +1,52 @@
+# =============================================================================
+# ALUMNOS CONECTADOS POR CASO (PARA LA VISTA DOCENTE)
+# =============================================================================
+# Cada ejecución anota en qué caso está la sesión y cuándo se la vio por
+# última vez; la vista docente y /metrics cuentan las sesiones activas. Las
+# que pasan `inactividad` segundos sin ejecutar se descartan (y, si se supera
+# el máximo, las vistas hace más tiempo), así que el registro queda acotado
+# aunque los alumnos cierren la pestaña sin desconectarse.
+#
+# El estado de cada sesión (widgets, params) es de Streamlit y lo libera
+# server.disconnectedSessionTTL (.streamlit/config.toml); su memoria se mide
+# con `python benchmark.py carga` (memoria_por_sesion_kib).
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+class RegistroSesiones:
+    def __init__(self, inactividad=30 * 60, maximo=5000):
+        self.inactividad = inactividad
+        self.maximo = maximo
+        self._sesiones = OrderedDict()  # id de sesión -> (caso, último acceso), de la menos a la más reciente
+        self._lock = threading.Lock()
+        self.expulsadas = 0
+
+    def actualizar(self, id_sesion, caso):
+        ahora = time.monotonic()
+        with self._lock:
+            self._sesiones[id_sesion] = (caso, ahora)
+            self._sesiones.move_to_end(id_sesion)
+            self._purgar(ahora)
+
+    def _purgar(self, ahora):
+        # Las más antiguas están al principio: se corta apenas aparece una vigente
+        limite = ahora - self.inactividad
+        while self._sesiones:
+            id_sesion, (_, acceso) = next(iter(self._sesiones.items()))
+            if acceso >= limite and len(self._sesiones) <= self.maximo:
+                break
+            del self._sesiones[id_sesion]
+            self.expulsadas += 1
+
+    def activas_por_caso(self):
+        with self._lock:
+            self._purgar(time.monotonic())
+            return Counter(caso for caso, _ in self._sesiones.values())
+
+    def estadisticas(self):
+        with self._lock:
+            self._purgar(time.monotonic())
+            activas = len(self._sesiones)
+        return {"activas": activas, "expulsadas": self.expulsadas}
@@ -0,0 +1,112 @@
+# =============================================================================
+# SERVIDOR LOCAL QUE IMITA EL ENDPOINT generateContent DE GEMINI
+# =============================================================================
+# Sirve para probar el cliente y medir latencias sin gastar cuota. Uso:
+#
+#   python stub_gemini.py --puerto 8765 --retardo 0.5 --tasa-error 0.1
+#
+# Para pruebas, servir() acepta además retardos por modelo (un modelo que acepta
+# la conexión y se queda colgado) y cortar_en, que corta la conexión a mitad
+# del stream después de ese número de trozos.
+#
+# y en los Secrets (o variables de entorno) de la app:
+#   GEMINI_BASE_URL = "http://127.0.0.1:8765/v1beta"
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RUTA = re.compile(r"^/v1beta/models/([^:/]+):(generateContent|streamGenerateContent)")
+TEXTO = "Muy bien planteado. Recuerda que la frecuencia define el mecanismo analgésico que activas."
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, igual que Google
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _trozo(self, datos):
+        self.wfile.write(f"{len(datos):x}\r\n".encode() + datos + b"\r\n")
+
+    def do_POST(self):
+        config = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        config.solicitudes += 1
+
+        ruta = RUTA.match(self.path)
+        if not ruta or ruta.group(1) not in config.modelos:
+            return self._json(404, {"error": {"code": 404, "message": "Model not found", "status": "NOT_FOUND"}})
+        if random.random() < config.tasa_error:
+            return self._json(500, {"error": {"code": 500, "message": "Error simulado", "status": "INTERNAL"}})
+
+        time.sleep(config.retardos.get(ruta.group(1), config.retardo))
+        palabras = config.texto.split(" ")
+
+        if ruta.group(2) == "generateContent":
+            return self._json(200, {"candidates": [{"content": {"parts": [{"text": config.texto}], "role": "model"}}]})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, palabra in enumerate(palabras):
+            if i == config.cortar_en:
+                self.close_connection = True  # sin el trozo final: el cliente ve una respuesta cortada
+                return
+            texto = palabra if i == 0 else " " + palabra
+            evento = {"candidates": [{"content": {"parts": [{"text": texto}], "role": "model"}}]}
+            self._trozo(f"data: {json.dumps(evento)}\r\n\r\n".encode())
+            self.wfile.flush()
+            time.sleep(config.retardo_token)
+        self._trozo(b"")
+
+
+def servir(puerto=0, retardo=0.0, tasa_error=0.0, retardo_token=0.0, modelos=("gemini-1.5-flash", "gemini-pro"), texto=TEXTO,
+           retardos=None, cortar_en=None):
+    # Arranca en un hilo de fondo; puerto 0 elige uno libre (ver servidor.server_port)
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.retardo = retardo
+    servidor.tasa_error = tasa_error
+    servidor.retardo_token = retardo_token
+    servidor.retardos = dict(retardos or {})
+    servidor.cortar_en = cortar_en
+    servidor.modelos = set(modelos)
+    servidor.texto = texto
+    servidor.solicitudes = 0
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub local del endpoint generateContent de Gemini.")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--retardo", type=float, default=0.0, help="Segundos antes de responder")
+    parser.add_argument("--retardo-token", type=float, default=0.0, help="Segundos entre trozos del stream")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Fracción de respuestas 500")
+    parser.add_argument("--modelos", nargs="+", default=["gemini-1.5-flash", "gemini-pro"], help="Modelos que existen (el resto da 404)")
+    args = parser.parse_args(argv)
+
+    servidor = servir(args.puerto, args.retardo, args.tasa_error, args.retardo_token, args.modelos)
+    print(f"Stub de Gemini en http://127.0.0.1:{servidor.server_port}/v1beta")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import pytest
+
+import cache_ia
+from cache_ia import CacheFeedback
+
+
+class _Reloj:
+    def __init__(self, ahora=1_000_000.0):
+        self.ahora = ahora
+
+    def time(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = _Reloj()
+    monkeypatch.setattr(cache_ia, "time", reloj)
+    return reloj
+
+
+def test_ttl_vence_en_memoria_y_en_disco(tmp_path, reloj):
+    cache = CacheFeedback(str(tmp_path / "c.sqlite"), ttl=60)
+    cache.guardar("k", "texto")
+    reloj.ahora += 59
+    assert cache.obtener("k") == "texto"
+    reloj.ahora += 2
+    assert cache.obtener("k") is None
+    assert cache.estadisticas()["en_memoria"] == 0
+    assert CacheFeedback(str(tmp_path / "c.sqlite"), ttl=60).obtener("k") is None
+
+
+def test_ttl_vence_solo_en_memoria():
+    cache = CacheFeedback(ttl=0)
+    cache.guardar("k", "texto")
+    cache._memoria["k"] = ("texto", cache_ia.time.time() - 1)
+    assert cache.obtener("k") is None
+
+
+def test_podar_quita_vencidas_y_las_menos_usadas(tmp_path, reloj):
+    cache = CacheFeedback(str(tmp_path / "c.sqlite"), ttl=1000, max_filas=10)
+    cache.guardar("vieja", "v")
+    reloj.ahora += 2000
+    for i in range(12):
+        reloj.ahora += 1
+        cache.guardar(f"k{i}", str(i))
+    cache._podar(reloj.ahora)
+    # Con 12 filas vigentes y tope 10 quedan 9 (90%): salen las de uso más antiguo
+    claves = {c for (c,) in cache._db.execute("SELECT clave FROM feedback")}
+    assert claves == {f"k{i}" for i in range(3, 12)}
+
+
+def test_calentar_sube_lo_mas_usado_del_disco(tmp_path, reloj):
+    ruta = str(tmp_path / "c.sqlite")
+    anterior = CacheFeedback(ruta, ttl=100)
+    anterior.guardar("vencida", "x")
+    reloj.ahora += 200
+    for i in range(3):
+        reloj.ahora += 1
+        anterior.guardar(f"k{i}", str(i))
+
+    cache = CacheFeedback(ruta, capacidad=2, ttl=100)
+    cache.calentar()
+    assert list(cache._memoria) == ["k1", "k2"]
+    assert cache.obtener("k2") == "2"
+    assert cache.estadisticas()["hits_memoria"] == 1
+
+    cache.calentar([("a", "A")])
+    assert cache.obtener("a") == "A"
@@ -0,0 +1,23 @@
+import json
+
+from calificacion import calificar_archivo, calificar_entrega
+
+
+def test_params_con_tipo_incorrecto_da_fila_de_error():
+    salida = calificar_entrega({"id": 1, "caso": "4. Lumbalgia Crónica", "equipo": "TENS", "params": {"freq": "5"}})
+    assert "error" in salida and "es_correcto" not in salida
+
+
+def test_lineas_mal_formadas_no_detienen_el_archivo(tmp_path):
+    entrada = tmp_path / "entregas.jsonl"
+    entrada.write_text("\n".join([
+        '{"caso": "4. Lumbalgia Crónica", "equipo": "TENS", "params": {"freq": "5"}}',
+        '{"caso": "4. Lumbalgia Cr',
+        '[1, 2]',
+        '{"caso": "4. Lumbalgia Crónica", "equipo": "TENS", "params": {"freq": 5, "duracion": 200}}',
+    ]), encoding="utf-8")
+    salida = tmp_path / "resultados.jsonl"
+    assert calificar_archivo(str(entrada), str(salida), procesos=2, tam_lote=1) == 4
+    filas = [json.loads(linea) for linea in salida.read_text(encoding="utf-8").splitlines()]
+    assert [("error" in fila) for fila in filas] == [True, True, True, False]
+    assert filas[3]["es_correcto"] is True
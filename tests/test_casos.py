@@ -0,0 +1,41 @@
+import json
+import os
+
+import pytest
+
+from casos import AlmacenCasos
+
+
+def _escribir(ruta, lineas, mtime):
+    # Reemplazo atómico, como al publicar una versión nueva de los casos
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    os.utime(ruta + ".tmp", ns=(mtime, mtime))
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _caso(id_caso):
+    return json.dumps({"id": id_caso, "curso": "C", "patologia": "P", "desc": id_caso, "solucion": {"equipos": ["TENS"]}})
+
+
+def test_recarga_con_linea_mal_formada_conserva_la_foto_anterior(tmp_path):
+    ruta = str(tmp_path / "casos.jsonl")
+    _escribir(ruta, [_caso("a"), _caso("b")], 1_000_000_000)
+    almacen = AlmacenCasos(ruta, intervalo_revision=0)
+    assert list(almacen) == ["a", "b"]
+    version = almacen.version
+
+    _escribir(ruta, [_caso("a"), '{"id": "roto"'], 2_000_000_000)
+    assert list(almacen) == ["a", "b"]
+    assert almacen["b"]["desc"] == "b"
+    assert almacen.version == version
+
+    _escribir(ruta, [_caso("a"), _caso("c")], 3_000_000_000)
+    assert list(almacen) == ["a", "c"]
+    assert almacen.version == version + 1
+
+
+def test_archivo_inexistente_en_la_primera_carga_levanta_error(tmp_path):
+    almacen = AlmacenCasos(str(tmp_path / "no_existe.jsonl"))
+    with pytest.raises(FileNotFoundError):
+        almacen.ids()
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from cliente_gemini import ClienteGemini, ErrorGemini, LimiteTokens
+from stub_gemini import TEXTO, servir
+
+
+@pytest.fixture
+def stub():
+    servidores = []
+
+    def arrancar(**opciones):
+        servidor = servir(**opciones)
+        servidores.append(servidor)
+        return servidor
+
+    yield arrancar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def _cliente(servidor, **opciones):
+    return ClienteGemini("prueba", url_base=f"http://127.0.0.1:{servidor.server_port}/v1beta", **opciones)
+
+
+def test_modelo_inexistente_pasa_al_respaldo(stub):
+    servidor = stub(modelos=("gemini-pro",))
+    cliente = _cliente(servidor)
+    assert cliente.generar("hola") == TEXTO
+    assert cliente.estadisticas() == {"solicitudes": 1, "coalescidas": 0, "respaldos": 1}
+
+
+def test_modelo_colgado_lanza_el_respaldo_en_paralelo(stub):
+    servidor = stub(retardos={"gemini-1.5-flash": 5.0})
+    cliente = _cliente(servidor, espera_primer_byte=0.2)
+    t0 = time.perf_counter()
+    assert cliente.generar("hola") == TEXTO
+    assert time.perf_counter() - t0 < 2.0
+    assert cliente.respaldos == 1
+
+
+def test_prompts_identicos_en_vuelo_van_una_sola_vez(stub):
+    servidor = stub(retardo=0.3)
+    cliente = _cliente(servidor)
+    primero, segundo = cliente.stream("mismo prompt"), cliente.stream("mismo prompt")
+    assert "".join(primero) == "".join(segundo) == TEXTO
+    assert (cliente.solicitudes, cliente.coalescidas, servidor.solicitudes) == (1, 1, 1)
+
+
+def test_limite_de_solicitudes(stub):
+    servidor = stub()
+    cliente = _cliente(servidor, limite=LimiteTokens(por_segundo=0.1, rafaga=1), espera_limite=0)
+    assert cliente.generar("uno") == TEXTO
+    with pytest.raises(ErrorGemini) as error:
+        cliente.generar("dos")
+    assert error.value.status == 429
+    assert servidor.solicitudes == 1
+
+
+def test_error_a_mitad_del_stream(stub):
+    servidor = stub(cortar_en=3)
+    cliente = _cliente(servidor)
+    recibido = []
+    with pytest.raises(ErrorGemini, match="interrumpida"):
+        for parte in cliente.stream("hola"):
+            recibido.append(parte)
+    assert "".join(recibido) == " ".join(TEXTO.split(" ")[:3])
+    assert cliente.respaldos == 0
@@ -0,0 +1,18 @@
+import numpy as np
+
+import dosis
+from validacion import compilar_reglas
+
+
+def test_irradiancia_a_distancia_cero_no_es_cero():
+    assert dosis.irradiancia_relativa_ir({"distancia": 50}) == 1.0
+    cero = dosis.irradiancia_relativa_ir({"distancia": 0})
+    assert cero == dosis.irradiancia_relativa_ir({"distancia": dosis.DISTANCIA_MIN_IR}) > 1.0
+    assert dosis.irradiancia_relativa_ir({}) == cero
+    np.testing.assert_allclose(dosis.irradiancia_relativa_ir({"distancia": np.array([0.0, 50.0, 100.0])}), [cero, 1.0, 0.25])
+
+
+def test_regla_max_rechaza_distancia_cero():
+    (regla,) = compilar_reglas("Infrarrojo", {"irradiancia_relativa_max": 2.0})
+    assert not regla.cumple(dosis.calcular("Infrarrojo", {"distancia": 0, "tiempo": 15})["irradiancia_relativa"])
+    assert regla.cumple(dosis.calcular("Infrarrojo", {"distancia": 50, "tiempo": 15})["irradiancia_relativa"])
@@ -0,0 +1,15 @@
+import socket
+
+import metricas
+
+
+def test_puerto_ocupado_no_rompe_ni_reintenta(monkeypatch, caplog):
+    monkeypatch.setattr(metricas, "_servidor", None)
+    monkeypatch.setattr(metricas, "_intentado", False)
+    with socket.socket() as ocupado:
+        ocupado.bind(("127.0.0.1", 0))
+        ocupado.listen()
+        puerto = ocupado.getsockname()[1]
+        assert metricas.iniciar_servidor(puerto) is None
+        assert metricas.iniciar_servidor(puerto) is None
+    assert len([r for r in caplog.records if "/metrics" in r.getMessage()]) == 1
@@ -0,0 +1,25 @@
+import registro as modulo
+from registro import RegistroIntentos
+from validacion import ResultadoValidacion
+
+
+def test_lote_fallido_no_detiene_el_escritor(tmp_path, monkeypatch):
+    escribir = RegistroIntentos._escribir
+    llamadas = []
+
+    def falla_la_primera_vez(self, conexion, lote):
+        llamadas.append(len(lote))
+        if len(llamadas) == 1:
+            raise ValueError("params no serializable")
+        return escribir(self, conexion, lote)
+
+    monkeypatch.setattr(RegistroIntentos, "_escribir", falla_la_primera_vez)
+    monkeypatch.setattr(modulo.atexit, "register", lambda *a: None)
+    registro = RegistroIntentos(str(tmp_path / "i.sqlite"), tam_lote=1, intervalo=0.01)
+    resultado = ResultadoValidacion(True, True, (), ())
+    for _ in range(3):
+        registro.registrar("Caso", "TENS", {"freq": 100}, "", resultado)
+    registro.cerrar()
+
+    assert registro.estadisticas() == {"escritos": 2, "descartados": 0, "lotes_fallidos": 1, "pendientes": 0}
+    assert registro.resumen()[0]["intentos"] == 2
@@ -0,0 +1,23 @@
+from sesion import RegistroSesiones
+
+
+def test_cuenta_sesiones_por_caso():
+    registro = RegistroSesiones()
+    registro.actualizar("a", "Caso 1")
+    registro.actualizar("b", "Caso 1")
+    registro.actualizar("c", "Caso 2")
+    registro.actualizar("a", "Caso 2")
+    assert registro.activas_por_caso() == {"Caso 1": 1, "Caso 2": 2}
+
+
+def test_expulsa_inactivas_y_las_mas_antiguas():
+    registro = RegistroSesiones(inactividad=0, maximo=10)
+    registro.actualizar("a", "Caso 1")
+    assert registro.estadisticas() == {"activas": 0, "expulsadas": 1}
+
+    registro = RegistroSesiones(maximo=2)
+    for id_sesion in "abc":
+        registro.actualizar(id_sesion, "Caso 1")
+    registro.actualizar("b", "Caso 2")
+    assert registro.activas_por_caso() == {"Caso 1": 1, "Caso 2": 1}
+    assert registro.estadisticas() == {"activas": 2, "expulsadas": 1}
@@ -0,0 +1,114 @@
+# =============================================================================
+# EQUIVALENCIA DEL MOTOR DE VALIDACIÓN CON LA LÓGICA ORIGINAL DE app.py
+# =============================================================================
+# `validacion_original` es el bloque "LÓGICA DE VALIDACIÓN" que vivía en app.py
+# antes de compilar las reglas. El motor debe dar el mismo resultado y los
+# mismos mensajes para todos los equipos, incluida Farádica: el bloque original
+# buscaba sus reglas bajo "Farádica" (sin subtipo), así que las que DB_CASOS
+# guarda por subtipo no se aplican.
+import random
+
+import pytest
+
+from casos import DB_CASOS
+from dosis import potencia_media
+from validacion import Restriccion, validar
+
+
+def validacion_original(solucion, equipo, nombre_completo_equipo, params):
+    feedback_tecnico = []
+    es_correcto = True
+    equipos_validos = solucion.get("equipos", [])
+
+    match_equipo = False
+    for eq in equipos_validos:
+        if eq in nombre_completo_equipo or (equipo == "Onda Corta" and eq == "Onda Corta"):
+            match_equipo = True
+            break
+
+    if not match_equipo:
+        es_correcto = False
+        feedback_tecnico.append(f"❌ **Equipo:** Elegiste {nombre_completo_equipo}, pero se sugiere: {', '.join(equipos_validos)}.")
+        return es_correcto, feedback_tecnico
+    feedback_tecnico.append(f"✅ **Equipo:** {nombre_completo_equipo} es una opción correcta.")
+
+    if equipo == "Ultrasonido" and "Ultrasonido" in solucion:
+        reglas = solucion["Ultrasonido"]
+        if "ciclo" in reglas and params["ciclo"] != reglas["ciclo"]:
+            es_correcto = False; feedback_tecnico.append(f"❌ **Ciclo:** Usaste {params['ciclo']}, correcto es {reglas['ciclo']}.")
+        if "frecuencia" in reglas and params["frecuencia"] != reglas["frecuencia"]:
+            es_correcto = False; feedback_tecnico.append(f"❌ **Frecuencia:** Usaste {params['frecuencia']}, correcto es {reglas['frecuencia']}.")
+        if "intensidad_max" in reglas and params["intensidad"] > reglas["intensidad_max"]:
+            feedback_tecnico.append(f"⚠️ **Intensidad:** {params['intensidad']} es un poco alta. Sugerido < {reglas['intensidad_max']}.")
+    if equipo == "TENS" and "TENS" in solucion:
+        reglas = solucion["TENS"]
+        if "freq_min" in reglas and params["freq"] < reglas["freq_min"]: feedback_tecnico.append("❌ **Frecuencia:** Muy baja para el objetivo.")
+        if "freq_max" in reglas and params["freq"] > reglas["freq_max"]: feedback_tecnico.append("❌ **Frecuencia:** Muy alta para el objetivo.")
+        if "duracion_min" in reglas and params["duracion"] < reglas["duracion_min"]: feedback_tecnico.append("❌ **Duración de pulso:** Insuficiente.")
+    if equipo == "Rusa" and "Rusa" in solucion:
+        reglas = solucion["Rusa"]
+        if "ratio" in reglas and params["ratio"] not in reglas["ratio"]: feedback_tecnico.append(f"❌ **Ratio:** {params['ratio']} no es ideal aquí.")
+        if "burst_min" in reglas and params["burst"] < reglas["burst_min"]: feedback_tecnico.append("❌ **Burst:** Muy bajo.")
+    if equipo == "Onda Corta" and "Onda Corta" in solucion:
+        reglas = solucion["Onda Corta"]
+        if "metodo" in reglas and params["metodo"] != reglas["metodo"]: feedback_tecnico.append(f"⚠️ **Método:** Se prefiere {reglas['metodo']}.")
+        p_media = params.get("media_resultante", 0)
+        if "dosis_min_potencia" in reglas and p_media < reglas["dosis_min_potencia"]:
+            es_correcto = False; feedback_tecnico.append(f"❌ **Dosis:** {p_media}W es atérmico/insuficiente. Mínimo {reglas['dosis_min_potencia']}W.")
+    if equipo == "TIF" and "TIF" in solucion:
+        reglas = solucion["TIF"]
+        if "portadora_min" in reglas and params["portadora"] < reglas["portadora_min"]: feedback_tecnico.append("❌ **Portadora:** Muy baja (molestia sensitiva).")
+        if "vector" in reglas and params["vector"] != reglas["vector"]: feedback_tecnico.append(f"⚠️ **Vector:** Se sugiere {reglas['vector']}.")
+    if "Farádica" in equipo and equipo in solucion:
+        reglas = solucion[equipo]
+        if "polaridad" in reglas and params["polaridad"] != reglas["polaridad"]: feedback_tecnico.append("❌ **Polaridad:** Incorrecta.")
+        if "busqueda_tiempo" in reglas and params["fase"] > 100: feedback_tecnico.append("❌ **Estrategia:** Debes buscar tiempos más cortos (Cronaxia).")
+    return es_correcto, feedback_tecnico
+
+
+def _params_al_azar(azar, equipo):
+    elegir = azar.choice
+    params = {
+        "TENS": lambda: {"freq": azar.randint(0, 250), "duracion": azar.randint(0, 500)},
+        "Rusa": lambda: {"burst": azar.randint(0, 100), "ratio": elegir(["1:1", "1:2", "1:4", "1:5"])},
+        "TIF": lambda: {"portadora": azar.randint(0, 10000), "vector": elegir(["Manual/Off", "6:6", "1:30:1:30"])},
+        "Farádica": lambda: {"polaridad": elegir(["Normal", "Inversión"]), "fase": float(azar.randrange(0, 5000, 10))},
+        "Ultrasonido": lambda: {"frecuencia": elegir(["1 MHz", "3 MHz"]), "intensidad": round(azar.random() * 3, 1),
+                                "ciclo": elegir(["100% (Continuo)", "50% (1:1)", "20% (1:4)", "10%"])},
+        "Onda Corta": lambda: {"metodo": elegir(["Capacitivo (Campo Eléctrico)", "Inductivo (Campo Magnético)"]),
+                               "modo": elegir(["Pulsado (PSWD)", "Continuo (CSWD)"]), "fase": azar.randint(0, 400),
+                               "frec_pulso": azar.randint(0, 1000), "potencia": azar.randint(0, 1000)},
+        "Infrarrojo": lambda: {"distancia": azar.randint(0, 100), "tiempo": azar.randint(0, 60)},
+    }[equipo]()
+    if equipo == "Onda Corta":
+        params["media_resultante"] = potencia_media(params)
+    return params
+
+
+def test_restriccion_es_abstracta():
+    with pytest.raises(TypeError):
+        Restriccion("x.y", "y", 1, "", True)
+
+
+def test_igual_a_la_logica_original():
+    azar = random.Random(1)
+    equipos = ["TENS", "Rusa", "TIF", "Farádica", "Ultrasonido", "Onda Corta", "Infrarrojo"]
+    for _ in range(5000):
+        caso = azar.choice(DB_CASOS.ids())
+        equipo = azar.choice(equipos)
+        nombre = f"Farádica ({azar.choice(['Träbert', 'Rectangular', 'Triangular'])})" if equipo == "Farádica" else equipo
+        params = _params_al_azar(azar, equipo)
+        esperado = validacion_original(DB_CASOS[caso]["solucion"], equipo, nombre, params)
+        resultado = validar(caso, nombre, params)
+        assert (resultado.es_correcto, list(resultado.mensajes)) == esperado, (caso, nombre, params)
+
+
+@pytest.mark.parametrize("caso, nombre, params", [
+    ("2. Esguince Tobillo Agudo", "Farádica (Träbert)", {"polaridad": "Inversión", "fase": 0.0}),
+    ("9. Evaluación Post-Hernia Discal", "Farádica (Rectangular)", {"polaridad": "Normal", "fase": 200.0}),
+])
+def test_faradica_no_aplica_reglas_por_subtipo(caso, nombre, params):
+    # Esos casos tienen reglas bajo el nombre con subtipo; la UI original no las evaluaba
+    resultado = validar(caso, nombre, params)
+    assert resultado.mensajes == (f"✅ **Equipo:** {nombre} es una opción correcta.",)
+    assert resultado.fallos == ()
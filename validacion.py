@@ -0,0 +1,247 @@
+# =============================================================================
+# MOTOR DE VALIDACIÓN DE TRATAMIENTOS
+# =============================================================================
+# Las reglas "solucion" de DB_CASOS se compilan una sola vez por caso en
+# restricciones tipadas (mínimos, máximos, conjuntos permitidos y valores
+# exactos), indexadas por (caso, equipo). Validar una configuración es entonces recorrer una tupla
+# ya armada, sin volver a interpretar los diccionarios en cada click.
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+
+import dosis
+from casos import DB_CASOS
+
+
+# Nombres completos de los equipos que ofrece la barra lateral de la app
+EQUIPOS = (
+    "TENS", "Rusa", "TIF", "Farádica (Träbert)", "Farádica (Rectangular)", "Farádica (Triangular)",
+    "Ultrasonido", "Onda Corta", "Infrarrojo",
+)
+
+
+def nombre_equipo(equipo, subtipo=None):
+    # Nombre con el que aparecen los equipos en DB_CASOS, ej "Farádica (Rectangular)"
+    return f"{equipo} ({subtipo})" if subtipo else equipo
+
+
+# =============================================================================
+# RESTRICCIONES
+# =============================================================================
+@dataclass(frozen=True)
+class Restriccion(ABC):
+    codigo: str      # ej "TENS.freq_min", estable entre ejecuciones
+    campo: str       # llave de params (o de una cantidad derivada)
+    limite: object
+    mensaje: str     # plantilla con {valor} y {limite}
+    bloquea: bool    # si falla, el tratamiento queda como incorrecto
+
+    @abstractmethod
+    def cumple(self, valor):
+        ...
+
+    def evaluar(self, params):
+        valor = params.get(self.campo)
+        if valor is not None and self.cumple(valor):
+            return None
+        return self.mensaje.format(valor=valor, limite=self.limite)
+
+
+class Minimo(Restriccion):
+    def cumple(self, valor):
+        return valor >= self.limite
+
+
+class Maximo(Restriccion):
+    def cumple(self, valor):
+        return valor <= self.limite
+
+
+class Exacto(Restriccion):
+    def cumple(self, valor):
+        return valor == self.limite
+
+
+class Permitidos(Restriccion):
+    def cumple(self, valor):
+        return valor in self.limite
+
+
+# Reglas entendidas por el validador, en el orden en que se reportan.
+# (llave en solucion, tipo, campo en params, mensaje, bloquea, límite fijo)
+REGLAS = {
+    "Ultrasonido": (
+        ("ciclo", Exacto, "ciclo", "❌ **Ciclo:** Usaste {valor}, correcto es {limite}.", True, None),
+        ("frecuencia", Exacto, "frecuencia", "❌ **Frecuencia:** Usaste {valor}, correcto es {limite}.", True, None),
+        ("intensidad_max", Maximo, "intensidad", "⚠️ **Intensidad:** {valor} es un poco alta. Sugerido < {limite}.", False, None),
+    ),
+    "TENS": (
+        ("freq_min", Minimo, "freq", "❌ **Frecuencia:** Muy baja para el objetivo.", False, None),
+        ("freq_max", Maximo, "freq", "❌ **Frecuencia:** Muy alta para el objetivo.", False, None),
+        ("duracion_min", Minimo, "duracion", "❌ **Duración de pulso:** Insuficiente.", False, None),
+    ),
+    "Rusa": (
+        ("ratio", Permitidos, "ratio", "❌ **Ratio:** {valor} no es ideal aquí.", False, None),
+        ("burst_min", Minimo, "burst", "❌ **Burst:** Muy bajo.", False, None),
+    ),
+    "Onda Corta": (
+        ("metodo", Exacto, "metodo", "⚠️ **Método:** Se prefiere {limite}.", False, None),
+        ("dosis_min_potencia", Minimo, "media_resultante", "❌ **Dosis:** {valor}W es atérmico/insuficiente. Mínimo {limite}W.", True, None),
+    ),
+    "TIF": (
+        ("portadora_min", Minimo, "portadora", "❌ **Portadora:** Muy baja (molestia sensitiva).", False, None),
+        ("vector", Exacto, "vector", "⚠️ **Vector:** Se sugiere {limite}.", False, None),
+    ),
+    "Farádica": (
+        ("polaridad", Exacto, "polaridad", "❌ **Polaridad:** Incorrecta.", False, None),
+        ("busqueda_tiempo", Maximo, "fase", "❌ **Estrategia:** Debes buscar tiempos más cortos (Cronaxia).", False, 100),
+    ),
+}
+
+
+def _familia(equipo):
+    # "Farádica (Rectangular)" comparte las reglas de "Farádica"
+    return equipo.split(" (")[0]
+
+
+# Reglas sobre cantidades derivadas (dosis.DOSIS): "<nombre>_min" / "<nombre>_max"
+MENSAJES_DOSIS = {
+    "_min": (Minimo, "❌ **{etiqueta}:** {{valor:.3g}}{unidad} es insuficiente. Mínimo {{limite}}{unidad}."),
+    "_max": (Maximo, "❌ **{etiqueta}:** {{valor:.3g}}{unidad} es excesiva. Máximo {{limite}}{unidad}."),
+}
+
+
+def compilar_reglas(equipo, reglas):
+    familia = _familia(equipo)
+    restricciones = []
+    usadas = set()
+    for clave, tipo, campo, mensaje, bloquea, fijo in REGLAS.get(familia, ()):
+        if clave not in reglas:
+            continue
+        usadas.add(clave)
+        limite = fijo if fijo is not None else reglas[clave]
+        if tipo is Permitidos:
+            limite = frozenset(limite)
+        restricciones.append(tipo(f"{equipo}.{clave}", campo, limite, mensaje, bloquea))
+
+    derivadas = dosis.DOSIS.get(familia, {})
+    for clave, limite in reglas.items():
+        campo, sufijo = clave[:-4], clave[-4:]
+        if clave in usadas or sufijo not in MENSAJES_DOSIS or campo not in derivadas:
+            continue
+        tipo, plantilla = MENSAJES_DOSIS[sufijo]
+        _, etiqueta, unidad = derivadas[campo]
+        mensaje = plantilla.format(etiqueta=etiqueta, unidad=f" {unidad}" if unidad else "")
+        restricciones.append(tipo(f"{equipo}.{clave}", campo, limite, mensaje, True))
+    return tuple(restricciones)
+
+
+# =============================================================================
+# RESULTADO Y MOTOR
+# =============================================================================
+@dataclass(frozen=True)
+class ResultadoValidacion:
+    es_correcto: bool
+    equipo_valido: bool
+    mensajes: tuple
+    fallos: tuple    # códigos de las restricciones que no se cumplieron
+
+    @property
+    def texto(self):
+        return " | ".join(self.mensajes)
+
+
+class _Compilado:
+    def __init__(self, version):
+        self.version = version
+        self.equipos = {}       # caso -> (equipos válidos, texto sugeridos, orden)
+        self.indice = {}        # (caso, equipo) -> restricciones
+        self.con_dosis = set()  # pares cuyas reglas usan cantidades derivadas
+
+
+class MotorValidacion:
+    # Compila cada caso la primera vez que se consulta. Si `casos` es un almacén
+    # que se recarga en caliente (casos.AlmacenCasos), lo compilado se descarta
+    # cuando cambia su versión.
+    def __init__(self, casos):
+        self._casos = casos
+        self._compilado = _Compilado(None)
+
+    def _vigente(self):
+        compilado = self._compilado
+        version = getattr(self._casos, "version", None)
+        if compilado.version != version:
+            compilado = self._compilado = _Compilado(version)
+        return compilado
+
+    def _caso(self, compilado, caso):
+        equipos = compilado.equipos.get(caso)
+        if equipos is not None:
+            return equipos
+        solucion = self._casos[caso]["solucion"]
+        equipos_validos = tuple(solucion.get("equipos", []))
+        for equipo in equipos_validos:
+            # Igual que la lógica original de app.py, las reglas se buscan bajo el nombre
+            # de la familia: las que DB_CASOS guarda bajo "Farádica (<subtipo>)" no se
+            # aplican. Aplicarlas cambiaría la nota de los alumnos y va como cambio aparte.
+            restricciones = compilar_reglas(equipo, solucion.get(_familia(equipo), {}))
+            compilado.indice[(caso, equipo)] = restricciones
+            derivadas = dosis.DOSIS.get(_familia(equipo), {})
+            if any(r.campo in derivadas for r in restricciones):
+                compilado.con_dosis.add((caso, equipo))
+        equipos = (frozenset(equipos_validos), ", ".join(equipos_validos), equipos_validos)
+        compilado.equipos[caso] = equipos
+        return equipos
+
+    def compilar_todo(self):
+        compilado = self._vigente()
+        for caso in self._casos:
+            self._caso(compilado, caso)
+
+    def restricciones(self, caso, equipo):
+        compilado = self._vigente()
+        if caso not in self._casos:
+            return ()
+        self._caso(compilado, caso)
+        return compilado.indice.get((caso, equipo), ())
+
+    def pares(self):
+        # Todas las combinaciones (caso, equipo) válidas, en el orden de DB_CASOS
+        compilado = self._vigente()
+        return tuple((caso, equipo) for caso in self._casos for equipo in self._caso(compilado, caso)[2])
+
+    def validar(self, caso, equipo, params):
+        compilado = self._vigente()
+        equipos_validos, sugeridos, _ = self._caso(compilado, caso)
+
+        # 1. Validar Nombre del Equipo
+        if equipo not in equipos_validos:
+            mensaje = f"❌ **Equipo:** Elegiste {equipo}, pero se sugiere: {sugeridos}."
+            return ResultadoValidacion(False, False, (mensaje,), (f"{equipo}.equipo",))
+
+        # 2. Validaciones específicas del equipo (los params ya calculados tienen prioridad)
+        if (caso, equipo) in compilado.con_dosis:
+            params = {**dosis.calcular(_familia(equipo), params), **params}
+
+        es_correcto = True
+        mensajes = [f"✅ **Equipo:** {equipo} es una opción correcta."]
+        fallos = []
+        for restriccion in compilado.indice[(caso, equipo)]:
+            mensaje = restriccion.evaluar(params)
+            if mensaje is None:
+                continue
+            mensajes.append(mensaje)
+            fallos.append(restriccion.codigo)
+            if restriccion.bloquea:
+                es_correcto = False
+        return ResultadoValidacion(es_correcto, True, tuple(mensajes), tuple(fallos))
+
+
+@lru_cache(maxsize=None)
+def motor():
+    # Una instancia por proceso, compartida entre sesiones
+    return MotorValidacion(DB_CASOS)
+
+
+def validar(caso, equipo, params):
+    return motor().validar(caso, equipo, params)